@@ -1,18 +1,156 @@
-# Command to read and display the contents of a file.
-# Usage: cat <filename>
-# Version: 1.0.0
+# Command to read and display the contents of files.
+# Usage: cat [-n] <filename1> <filename2> ...
+# Version: 1.2.1
 
-def run(args, fs):
-    if not args:
-        print("No file specified.")
+import os
+import sys
+import mmap
+import text_stream
+
+CHUNK_SIZE = 1024 * 1024
+MMAP_THRESHOLD = 16 * 1024 * 1024 # Files above this are mapped instead of read into buffers
+
+def stdout_fd(): # Real stdout descriptor, or None when stdout is captured (pipelines)
+    try:
+        return sys.stdout.fileno()
+
+    except (AttributeError, OSError, ValueError):
+        return None
+
+def write_bytes(data):
+    if hasattr(sys.stdout, "buffer"):
+        sys.stdout.buffer.write(data)
+    else:
+        sys.stdout.write(bytes(data).decode(errors="replace"))
+
+def copy_file(file, size): # Zero-copy where the platform allows it, big binary chunks otherwise
+    fd = stdout_fd()
+
+    if fd is not None and hasattr(os, "sendfile"):
+        sys.stdout.flush()
+        offset = 0
+
+        try:
+            while offset < size:
+                sent = os.sendfile(fd, file.fileno(), offset, size - offset)
+                if sent == 0:
+                    break
+                offset += sent
+            return
+
+        except OSError:
+            file.seek(offset)
+
+    if size >= MMAP_THRESHOLD and file.tell() == 0:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            view = memoryview(mapped)
+            for start in range(0, size, CHUNK_SIZE):
+                write_bytes(view[start:start + CHUNK_SIZE])
+            view.release()
         return
-    
-    path = fs.abs_path(args[0])
+
+    while True:
+        chunk = file.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        write_bytes(chunk)
+
+def number_lines(file, number): # -n without loading the file: one line at a time, written in blocks
+    block = []
+
+    for line in file:
+        block.append(b"%6d\t" % number + line)
+        number += 1
+
+        if len(block) >= 4096:
+            write_bytes(b"".join(block))
+            block.clear()
+
+    if block:
+        write_bytes(b"".join(block))
+
+    return number
+
+def ends_with_newline(file, size):
+    if size == 0:
+        return True
+
+    file.seek(size - 1)
+    return file.read(1) == b"\n"
+
+def run_stream(args, fs, stdin):
+    number = '-n' in args
+    files = [arg for arg in args if arg != '-n']
+
+    failed = [] # Files that could not be read, filled in while streaming
+
+    if not files:
+        if stdin is None:
+            print("No file specified.")
+            return False
+
+        lines = stdin
+
+    else:
+        lines = (line for name in files for line in stream_file(name, fs, failed))
+
+    if number:
+        for count, line in enumerate(lines, 1):
+            yield f"{count:6d}\t{line}"
+    else:
+        yield from lines
+
+    return not failed
+
+def stream_file(name, fs, failed):
+    path = fs.abs_path(name)
     try:
-        with open(path) as file:
-            print(file.read())
+        yield from text_stream.read_lines(path)
 
     except FileNotFoundError:
-        print("File not found.")
-        return
-    
\ No newline at end of file
+        print(f"{name}: File not found.")
+        failed.append(name)
+
+    except IsADirectoryError:
+        print(f"{name}: Is a directory")
+        failed.append(name)
+
+def run(args, fs):
+    number = '-n' in args
+    files = [arg for arg in args if arg != '-n']
+
+    if not files:
+        print("No file specified.")
+        return False
+
+    line_number = 1
+    ok = True
+
+    for name in files:
+        path = fs.abs_path(name)
+        sys.stdout.flush() # Earlier print() output must come before raw bytes
+        try:
+            with open(path, 'rb') as file:
+                size = os.fstat(file.fileno()).st_size
+
+                if number:
+                    line_number = number_lines(file, line_number)
+                else:
+                    copy_file(file, size)
+
+                newline = not ends_with_newline(file, size)
+
+            if newline: # Keep the prompt on its own line
+                write_bytes(b"\n")
+
+            sys.stdout.flush()
+
+        except FileNotFoundError:
+            print(f"{name}: File not found.")
+            ok = False
+
+        except IsADirectoryError:
+            print(f"{name}: Is a directory")
+            ok = False
+
+    return ok
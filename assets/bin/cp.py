@@ -1,9 +1,148 @@
 # Command to copy files or directories.
-# Usage: cp [-r] <source> <destination>
-# Version: 1.0.0
+# Usage: cp [-r, -u, --skip-existing] <source> <destination>
+# Version: 1.1.0
 
 import os
+import sys
+import time
 import shutil
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import auth
+
+MAX_WORKERS = 8
+CHUNK_SIZE = 8 * 1024 * 1024
+
+def copy_data(source, destination): # copy_file_range/sendfile keep the data in the kernel on Linux
+    with open(source, 'rb') as src, open(destination, 'wb') as dst:
+        size = os.fstat(src.fileno()).st_size
+        copied = 0
+
+        for zero_copy in ("copy_file_range", "sendfile"):
+            if not hasattr(os, zero_copy):
+                continue
+
+            try:
+                dst.seek(copied)
+                while copied < size:
+                    if zero_copy == "copy_file_range":
+                        sent = os.copy_file_range(src.fileno(), dst.fileno(), size - copied, copied, copied)
+                    else:
+                        sent = os.sendfile(dst.fileno(), src.fileno(), copied, size - copied)
+
+                    if sent == 0:
+                        break
+                    copied += sent
+
+                if copied >= size:
+                    return size
+
+            except OSError: # Not supported for this file system, try the next method
+                continue
+
+        src.seek(copied)
+        dst.seek(copied)
+        dst.truncate()
+        shutil.copyfileobj(src, dst, CHUNK_SIZE)
+
+    return size
+
+def copy_file(source, destination):
+    size = copy_data(source, destination)
+    shutil.copystat(source, destination)
+    return size
+
+def should_copy(source_info, destination, skip_existing, update):
+    if not (skip_existing or update):
+        return True
+
+    try:
+        destination_info = os.stat(destination)
+
+    except FileNotFoundError:
+        return True
+
+    if skip_existing:
+        return False
+
+    return source_info.st_mtime > destination_info.st_mtime # -u: only when the source is newer
+
+def plan_tree(source, destination, skip_existing, update): # Create directories, return the file copies to run
+    jobs = []
+    skipped = 0
+    stack = [(source, destination)]
+
+    while stack:
+        src_dir, dst_dir = stack.pop()
+        os.makedirs(dst_dir, exist_ok=True)
+
+        with os.scandir(src_dir) as entries:
+            for entry in entries:
+                target = os.path.join(dst_dir, entry.name)
+
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append((entry.path, target))
+                    continue
+
+                info = entry.stat()
+                if should_copy(info, target, skip_existing, update):
+                    jobs.append((entry.path, target, info.st_size))
+                else:
+                    skipped += 1
+
+        shutil.copystat(src_dir, dst_dir)
+
+    return jobs, skipped
+
+def format_bytes(size):
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.1f} {unit}"
+        size /= 1024
+
+def print_progress(done, total, start_time, final=False):
+    elapsed = max(time.perf_counter() - start_time, 1e-6)
+    speed = done / elapsed
+
+    if final:
+        print(f"\r{format_bytes(done)} copied in {elapsed:.2f}s ({format_bytes(speed)}/s)" + " " * 10)
+        return
+
+    if speed > 0:
+        eta = (total - done) / speed
+    else:
+        eta = 0
+
+    percent = done * 100 // total if total else 100
+    sys.stdout.write(f"\r{percent:3d}% {format_bytes(done)}/{format_bytes(total)} {format_bytes(speed)}/s ETA {eta:.0f}s ")
+    sys.stdout.flush()
+
+def copy_tree(source, destination, skip_existing, update):
+    jobs, skipped = plan_tree(source, destination, skip_existing, update)
+    total = sum(size for src, dst, size in jobs)
+    done = 0
+    failed = 0
+    start_time = time.perf_counter()
+    last_update = 0
+    show_progress = sys.stdout.isatty()
+
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        futures = {executor.submit(copy_file, src, dst): src for src, dst, size in jobs}
+
+        for future in as_completed(futures):
+            try:
+                done += future.result()
+
+            except OSError as e:
+                failed += 1
+                print(f"\nCannot copy '{futures[future]}': {e.strerror}")
+
+            now = time.perf_counter()
+            if show_progress and now - last_update > 0.1:
+                print_progress(done, total, start_time)
+                last_update = now
+
+    print_progress(done, total, start_time, final=True)
+    return len(jobs) - failed, skipped, failed
 
 def run(args, fs):
     if len(args) < 2:
@@ -11,27 +150,47 @@ def run(args, fs):
         return
 
     recursive = '-r' in args
-    if recursive:
-        args.remove('-r')
-    
+    update = '-u' in args
+    skip_existing = '--skip-existing' in args
+    args = [arg for arg in args if arg not in ('-r', '-u', '--skip-existing')]
+
     if len(args) != 2:
         print("Invalid number of arguments.")
         return
-    
+
     source = fs.abs_path(args[0])
     destination = fs.abs_path(args[1])
 
+    if os.path.isdir(destination): # Copy into an existing directory
+        destination = os.path.join(destination, os.path.basename(source))
+
+    if not auth.check_permissions(source, action="read") or not auth.check_permissions(os.path.dirname(destination), action="write"):
+        print("Permission denied.")
+        return
+
     try:
         if os.path.isfile(source):
-            shutil.copy2(source, destination)
-            print(f"Copied file: {fs.rel_path(source)} to {fs.rel_path(destination)}")
-        
+            if should_copy(os.stat(source), destination, skip_existing, update):
+                copy_file(source, destination)
+                auth.copy_permissions(source, destination)
+                print(f"Copied file: {fs.rel_path(source)} to {fs.rel_path(destination)}")
+            else:
+                print(f"Skipped file: {fs.rel_path(destination)} is up to date")
+
         elif os.path.isdir(source):
             if recursive:
-                shutil.copytree(source, destination)
-                print(f"Copied directory: {fs.rel_path(source)} to {fs.rel_path(destination)}")
+                if destination == source or destination.startswith(source + os.sep):
+                    print(f"Cannot copy '{fs.rel_path(source)}' into itself")
+                    return
+
+                copied, skipped, failed = copy_tree(source, destination, skip_existing, update)
+                auth.copy_permissions(source, destination)
+                print(f"Copied directory: {fs.rel_path(source)} to {fs.rel_path(destination)} ({copied} files copied, {skipped} skipped, {failed} failed)")
             else:
                 print(f"Cannot copy '{fs.rel_path(source)}': Is a directory")
 
+        else:
+            print(f"Cannot copy '{fs.rel_path(source)}': No such file or directory")
+
     except FileNotFoundError:
         print(f"Cannot copy '{fs.rel_path(source)}': No such file or directory")
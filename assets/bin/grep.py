@@ -0,0 +1,97 @@
+# Command to print lines matching a pattern.
+# Usage: grep [-i, -v, -n, -c] <pattern> [file1 file2 ...] / <command> | grep <pattern>
+# Version: 1.0.1
+
+import re
+import text_stream
+
+def parse_args(args):
+    flags = set()
+    rest = []
+
+    for arg in args:
+        if arg.startswith('-') and len(arg) > 1 and not rest:
+            flags.update(arg[1:])
+        else:
+            rest.append(arg)
+
+    return flags, rest
+
+def grep_lines(lines, regex, flags, label=None): # Filter one stream of lines, returns the number of matches
+    invert = 'v' in flags
+    count = 0
+
+    for number, line in enumerate(lines, 1):
+        if bool(regex.search(line)) == invert:
+            continue
+
+        count += 1
+        if 'c' in flags:
+            continue
+
+        if 'n' in flags:
+            line = f"{number}:{line}"
+
+        if label:
+            line = f"{label}:{line}"
+
+        yield line
+
+    if 'c' in flags:
+        if label:
+            yield f"{label}:{count}"
+        else:
+            yield str(count)
+
+    return count
+
+def run_stream(args, fs, stdin):
+    flags, rest = parse_args(args)
+
+    if not rest:
+        print("Missing pattern.")
+        return 2 # Like grep: 1 means no match, 2 an error
+
+    pattern = rest[0]
+    files = rest[1:]
+
+    try:
+        regex = re.compile(pattern, re.IGNORECASE if 'i' in flags else 0)
+
+    except re.error as e:
+        print(f"Invalid pattern '{pattern}': {e}")
+        return 2
+
+    if not files:
+        if stdin is None:
+            print("No file specified.")
+            return 2
+
+        matched = yield from grep_lines(stdin, regex, flags)
+        return 0 if matched else 1
+
+    matched = 0
+    failed = False
+
+    for name in files:
+        path = fs.abs_path(name)
+        label = name if len(files) > 1 else None
+
+        try:
+            matched += yield from grep_lines(text_stream.read_lines(path), regex, flags, label)
+
+        except FileNotFoundError:
+            print(f"{name}: No such file or directory")
+            failed = True
+
+        except IsADirectoryError:
+            print(f"{name}: Is a directory")
+            failed = True
+
+    if failed:
+        return 2
+
+    return 0 if matched else 1
+
+def run(args, fs):
+    return text_stream.write_lines(run_stream(args, fs, None))
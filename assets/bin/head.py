@@ -0,0 +1,94 @@
+# Command to display the first lines of files.
+# Usage: head [-n <count>, -c <bytes>] [file1 file2 ...] / <command> | head [-n <count>, -c <bytes>]
+# Version: 1.1.2
+
+import itertools
+import text_stream
+
+def parse_args(args): # Returns (mode, count, files) or None, mode is 'n' (lines) or 'c' (bytes)
+    mode = 'n'
+    count = 10
+    files = []
+    i = 0
+
+    while i < len(args):
+        if args[i] in ('-n', '-c'):
+            try:
+                count = int(args[i + 1])
+
+            except (IndexError, ValueError):
+                print("Invalid count.")
+                return None
+
+            mode = args[i][1]
+            i += 2
+            continue
+
+        files.append(args[i])
+        i += 1
+
+    return mode, count, files
+
+def head_bytes(path, count):
+    with open(path, 'rb') as file:
+        return file.read(count).decode(errors="replace")
+
+def head_file(name, fs, mode, count):
+    path = fs.abs_path(name)
+    try:
+        if mode == 'c':
+            text = head_bytes(path, count)
+            if text: # -c 0 or an empty file prints nothing
+                if text.endswith("\n"): # run() ends every line with a newline already
+                    text = text[:-1]
+                yield text
+        else:
+            yield from itertools.islice(text_stream.read_lines(path), count)
+
+    except FileNotFoundError:
+        print(f"{name}: File not found.")
+        return False
+
+    except IsADirectoryError:
+        print(f"{name}: Is a directory")
+        return False
+
+    return True
+
+def run_stream(args, fs, stdin):
+    parsed = parse_args(list(args))
+    if parsed is None:
+        return False
+
+    mode, count, files = parsed
+
+    if not files:
+        if stdin is None:
+            print("No file specified.")
+            return False
+
+        if mode == 'c':
+            text = "\n".join(itertools.islice(stdin, count))[:count] # At most count lines can hold count bytes
+            if text:
+                if text.endswith("\n"):
+                    text = text[:-1]
+                yield text
+            return
+
+        yield from itertools.islice(stdin, count) # Stop pulling from upstream once we have enough
+        return
+
+    ok = True
+
+    for index, name in enumerate(files):
+        if len(files) > 1:
+            if index:
+                yield ""
+            yield f"==> {name} <=="
+
+        ok = (yield from head_file(name, fs, mode, count)) and ok
+
+    return ok
+
+def run(args, fs):
+    return text_stream.write_lines(run_stream(args, fs, None))
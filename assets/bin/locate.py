@@ -0,0 +1,68 @@
+# Command to find files by name using the file name index.
+# Usage: locate [-i, -c, -l <limit>] <pattern>
+# Version: 1.0.1
+
+import os
+import auth
+import file_index
+import text_stream
+
+def run_stream(args, fs, stdin):
+    args = list(args)
+    ignore_case = '-i' in args
+    count_only = '-c' in args
+    limit = None
+
+    for flag in ('-i', '-c'):
+        while flag in args:
+            args.remove(flag)
+
+    if '-l' in args:
+        index = args.index('-l')
+        try:
+            limit = int(args[index + 1])
+
+        except (IndexError, ValueError):
+            print("Invalid limit.")
+            return False
+
+        del args[index:index + 2]
+
+    if not args:
+        print("Missing pattern.")
+        return False
+
+    pattern = args[0]
+    if ignore_case:
+        pattern = pattern.lower()
+
+    index = file_index.load_index()
+    if index is None:
+        print("No file index found. Run 'updatedb' first.")
+        return False
+
+    matches = []
+    for virtual_path, is_dir in file_index.iter_paths(index):
+        name = os.path.basename(virtual_path)
+        if ignore_case:
+            name = name.lower()
+
+        if pattern in name:
+            matches.append(virtual_path)
+
+    # Only show what the current user could reach, checked in one pass over the index
+    allowed = auth.check_permissions_many([file_index.host_path(path) for path in matches])
+    matches = [path for path, ok in zip(matches, allowed) if ok]
+
+    if limit is not None:
+        matches = matches[:limit]
+
+    if count_only:
+        yield str(len(matches))
+        return
+
+    yield from matches
+    return bool(matches) # Nothing found is a failure, like locate
+
+def run(args, fs):
+    return text_stream.write_lines(run_stream(args, fs, None))
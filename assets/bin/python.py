@@ -1,15 +1,309 @@
 # Command to run Python files.
-# Usage: python <file.py> / python -m venv <path> / python deactivate
-# Version: 1.1.0
+# Usage: python [-<version>] <file.py> / python [-<version>] -m venv [--copies, --symlinks] <path> / python deactivate / python --list / python --pool-stats
+# Version: 1.4.3
 
 import os
+import re
 import sys
+import time
+import atexit
+import threading
 import subprocess
 import auth
+import code_cache
 import json
 import shutil
+import hashlib
 
 current_venv = None
+venv_pythons = {}
+interpreters = None # In-memory copy of the interpreter registry
+
+INTERPRETERS_FILE = os.path.join("fs", "var", "interpreters.json")
+VENV_TEMPLATES = os.path.join("fs", "var", "cache", "venv")
+TEMPLATES_SUPPORTED = os.name == "posix" # Windows launchers (pip.exe) embed the venv path in a binary
+PROMPT_TOKEN = "pyos-venv-prompt-7f3c" # Templates are built with this --prompt, replaced by each venv's name
+PYTHON_NAME = re.compile(r"^python(\d+(\.\d+)?)?(\.exe)?$", re.IGNORECASE)
+PROBE_SOURCE = (
+    "import sys, json, importlib.util as u; "
+    "print(json.dumps({'version': '.'.join(map(str, sys.version_info[:3])), "
+    "'implementation': sys.implementation.name, "
+    "'venv': bool(u.find_spec('venv') and u.find_spec('ensurepip')), "
+    "'pip': bool(u.find_spec('pip'))}))"
+)
+
+POOL_SUPPORTED = os.name == "posix" # Workers get their job pipes through pass_fds
+POOL_SIZE = 2 # Idle workers kept warm per interpreter
+POOL_IDLE_TIMEOUT = 120 # Seconds before an idle worker is stopped
+
+# Runs inside each worker: read script jobs from a pipe, run each with fresh globals, report the exit status
+WORKER_SOURCE = r"""
+import os, sys, json, runpy, atexit, signal, sysconfig, traceback
+
+jobs = os.fdopen(int(sys.argv[1]), "r")
+results = os.fdopen(int(sys.argv[2]), "w")
+base_cwd = os.getcwd()
+base_path = list(sys.path[1:])
+base_environ = dict(os.environ)
+base_modules = set(sys.modules)
+base_streams = (sys.stdin, sys.stdout, sys.stderr)
+base_recursion_limit = sys.getrecursionlimit()
+base_signals = {}
+for number in signal.valid_signals():
+    try:
+        handler = signal.getsignal(number)
+    except (OSError, ValueError):
+        continue
+    if handler is not None:
+        base_signals[number] = handler
+
+# Only the standard library stays warm: site-packages can change under us with pip install/uninstall
+stdlib_paths = tuple(set(os.path.join(sysconfig.get_paths()[key], "") for key in ("stdlib", "platstdlib")))
+
+def is_stdlib(module):
+    module_file = getattr(module, "__file__", None) or ""
+    return module_file.startswith(stdlib_paths) and "site-packages" not in module_file and "dist-packages" not in module_file
+
+def exit_code(code):
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code
+    print(code, file=sys.stderr)
+    return 1
+
+while True:
+    signal.signal(signal.SIGINT, signal.SIG_IGN) # Ctrl+C in the shell must not kill an idle worker
+    line = jobs.readline()
+    if not line:
+        break
+
+    job = json.loads(line)
+    path = job["path"]
+    sys.argv = [path] + job["args"]
+    sys.path[:] = [os.path.dirname(path)] + base_path
+    status = 0
+
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+    try:
+        runpy.run_path(path, run_name="__main__") # A real, temporary __main__ module, so pickle and get_type_hints work
+    except SystemExit as e:
+        status = exit_code(e.code)
+    except KeyboardInterrupt:
+        status = 130
+    except BaseException:
+        traceback.print_exc()
+        status = 1
+
+    atexit._run_exitfuncs() # The script's exit handlers run now, not when the worker stops
+
+    for stream in (sys.stdout, sys.stderr):
+        try:
+            stream.flush()
+        except Exception:
+            pass
+
+    # Undo what the script changed to the process, so the next job starts from the same state
+    sys.stdin, sys.stdout, sys.stderr = base_streams
+    sys.argv = [""]
+    sys.path[:] = base_path
+    sys.setrecursionlimit(base_recursion_limit)
+    for number, handler in base_signals.items():
+        try:
+            signal.signal(number, handler)
+        except (OSError, ValueError):
+            pass
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    os.chdir(base_cwd)
+    os.environ.clear()
+    os.environ.update(base_environ)
+    for name in set(sys.modules) - base_modules:
+        if not is_stdlib(sys.modules[name]):
+            del sys.modules[name]
+
+    results.write(json.dumps({"status": status}) + "\n")
+    results.flush()
+"""
+
+class Worker:
+    def __init__(self, python, env):
+        job_read, self.job_write = os.pipe()
+        self.result_read, result_write = os.pipe()
+
+        self.process = subprocess.Popen(
+            [python, "-c", WORKER_SOURCE, str(job_read), str(result_write)],
+            env=env, pass_fds=(job_read, result_write), close_fds=True
+        )
+
+        os.close(job_read)
+        os.close(result_write)
+        self.jobs = os.fdopen(self.job_write, 'w')
+        self.results = os.fdopen(self.result_read, 'r')
+        self.last_used = time.monotonic()
+
+    def alive(self):
+        return self.process.poll() is None
+
+    def run(self, path, args): # Returns the script's exit status, or None if the worker died
+        self.jobs.write(json.dumps({"path": path, "args": args}) + "\n")
+        self.jobs.flush()
+
+        line = self.results.readline()
+        self.last_used = time.monotonic()
+
+        if not line:
+            return None
+
+        return json.loads(line)["status"]
+
+    def stop(self):
+        try:
+            self.jobs.close()
+            self.results.close()
+
+        except OSError:
+            pass
+
+        try:
+            self.process.wait(timeout=1)
+
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+
+class WorkerPool: # Warm interpreters for one (python, venv) pair
+    def __init__(self, python, venv):
+        self.python = python
+        self.venv = venv
+        self.idle = []
+        self.busy = 0
+        self.stats = {"spawned": 0, "runs": 0, "warm": 0, "evicted": 0, "failed": 0}
+
+    def environment(self):
+        env = os.environ.copy()
+
+        if self.venv:
+            env['VIRTUAL_ENV'] = self.venv
+            env['PATH'] = os.path.dirname(self.python) + os.pathsep + env.get('PATH', '')
+
+        return env
+
+    def spawn(self):
+        self.stats["spawned"] += 1
+        return Worker(self.python, self.environment())
+
+    def acquire(self):
+        while self.idle:
+            worker = self.idle.pop()
+            if worker.alive():
+                self.stats["warm"] += 1
+                return worker
+
+            worker.stop()
+
+        return self.spawn()
+
+    def run(self, path, args):
+        worker = self.acquire()
+        self.busy += 1
+        self.stats["runs"] += 1
+
+        try:
+            sys.stdout.flush() # Our buffered output must come before the script's
+            status = worker.run(path, args)
+
+        except BaseException: # Interrupted while waiting: the worker's reply would be out of sync
+            worker.process.kill()
+            worker.stop()
+            raise
+
+        finally:
+            self.busy -= 1
+
+        if status is None: # The script killed its interpreter, start a replacement now so the next run is warm
+            self.stats["failed"] += 1
+            worker.stop()
+            self.idle.append(self.spawn())
+            return 1
+
+        self.idle.append(worker)
+        while len(self.idle) > POOL_SIZE:
+            self.idle.pop(0).stop()
+
+        return status
+
+    def evict_idle(self, now):
+        for worker in list(self.idle):
+            if now - worker.last_used > POOL_IDLE_TIMEOUT or not worker.alive():
+                self.idle.remove(worker)
+                worker.stop()
+                self.stats["evicted"] += 1
+
+    def shutdown(self):
+        for worker in self.idle:
+            worker.stop()
+
+        self.idle.clear()
+
+pools = {}
+pools_lock = threading.Lock()
+reaper = None
+
+def reap_idle_workers(): # Background thread: stop workers nobody has used for POOL_IDLE_TIMEOUT
+    while True:
+        time.sleep(POOL_IDLE_TIMEOUT / 4)
+
+        with pools_lock:
+            now = time.monotonic()
+            for pool in pools.values():
+                pool.evict_idle(now)
+
+def shutdown_pools():
+    with pools_lock:
+        for pool in pools.values():
+            pool.shutdown()
+
+def get_pool(python, venv):
+    global reaper
+
+    key = (python, venv)
+    if key not in pools:
+        pools[key] = WorkerPool(python, venv)
+
+    if reaper is None:
+        reaper = threading.Thread(target=reap_idle_workers, daemon=True)
+        reaper.start()
+        atexit.register(shutdown_pools)
+
+    return pools[key]
+
+def run_pooled(python, venv, path, args): # Run a script on a warm worker, falls back to a new process
+    if not POOL_SUPPORTED:
+        env = WorkerPool(python, venv).environment()
+        return subprocess.run([python, path] + args, env=env).returncode
+
+    with pools_lock:
+        pool = get_pool(python, venv)
+        return pool.run(path, args)
+
+def print_pool_stats():
+    if not POOL_SUPPORTED:
+        print("Interpreter pool is not supported on this platform.")
+        return
+
+    with pools_lock:
+        if not pools:
+            print("No interpreter pools are running.")
+            return
+
+        for (python, venv), pool in pools.items():
+            stats = pool.stats
+            print(f"{python}" + (f" (venv: {venv})" if venv else ""))
+            print(f"  idle: {len(pool.idle)}, busy: {pool.busy}, spawned: {stats['spawned']}, evicted: {stats['evicted']}")
+            print(f"  runs: {stats['runs']}, warm: {stats['warm']}, failed: {stats['failed']}")
+
+    print(f"Idle workers are stopped after {POOL_IDLE_TIMEOUT}s.")
 
 def load_current_venv():
     global current_venv
@@ -42,7 +336,79 @@ def save_current_venv():
             "venv_name": venv_name
         }, file)
 
-def create_venv(path, fs):
+def template_dir(python_exe, mode):
+    key = hashlib.sha1(f"{os.path.realpath(python_exe)}|{mode}".encode()).hexdigest()[:16]
+    return os.path.abspath(os.path.join(VENV_TEMPLATES, key)) # Absolute: it is written into the template's files
+
+def get_venv_template(python_exe, mode): # Build a template venv once per interpreter and link mode
+    root = template_dir(python_exe, mode)
+    template = os.path.join(root, "venv")
+    meta_file = os.path.join(root, "template.json")
+    signature = path_signature(os.path.realpath(python_exe))
+
+    try:
+        with open(meta_file, 'r') as file:
+            meta = json.load(file)
+
+        if meta.get("signature") == signature and meta.get("prompt") == PROMPT_TOKEN and os.path.isdir(template):
+            return template
+
+    except (json.JSONDecodeError, IOError):
+        pass
+
+    print("Building virtual environment template (only needed once per Python version)...")
+    building = f"{root}.{os.getpid()}.tmp"
+    shutil.rmtree(building, ignore_errors=True)
+    os.makedirs(building)
+
+    built = os.path.join(building, "venv")
+    result = subprocess.run([python_exe, "-m", "venv", f"--{mode}", "--prompt", PROMPT_TOKEN, built], capture_output=True, text=True)
+    if result.returncode != 0:
+        shutil.rmtree(building, ignore_errors=True)
+        raise RuntimeError(result.stderr.strip())
+
+    relocate_venv(built, built, template) # It was built under a temporary name
+
+    with open(os.path.join(building, "template.json"), 'w') as file:
+        json.dump({"python": python_exe, "signature": signature, "prompt": PROMPT_TOKEN}, file)
+
+    shutil.rmtree(root, ignore_errors=True)
+    os.replace(building, root)
+    return template
+
+def relocate_venv(venv_dir, old_location, new_location, prompt=None): # Point scripts, activation files and pyvenv.cfg at the new location
+    old_path = old_location.encode()
+    new_path = new_location.encode()
+    token = PROMPT_TOKEN.encode()
+
+    candidates = [os.path.join(venv_dir, "pyvenv.cfg")]
+    for scripts in ("bin", "Scripts"):
+        scripts_dir = os.path.join(venv_dir, scripts)
+        if os.path.isdir(scripts_dir):
+            candidates += [entry.path for entry in os.scandir(scripts_dir) if entry.is_file(follow_symlinks=False)]
+
+    for file_path in candidates:
+        with open(file_path, 'rb') as file:
+            data = file.read()
+
+        if b"\0" in data: # Leave binaries alone
+            continue
+
+        if old_path not in data and not (prompt and token in data):
+            continue
+
+        data = data.replace(old_path, new_path)
+        if prompt: # Works whatever layout this Python's activate scripts use for the prompt
+            data = data.replace(token, prompt.encode())
+
+        temp_file = file_path + ".tmp"
+        with open(temp_file, 'wb') as file:
+            file.write(data)
+
+        shutil.copymode(file_path, temp_file)
+        os.replace(temp_file, file_path)
+
+def create_venv(path, fs, version=None, mode=None):
     abs_path = fs.abs_path(path)
 
     if not auth.check_permissions(os.path.dirname(abs_path), action="write"):
@@ -54,7 +420,11 @@ def create_venv(path, fs):
         return False
     
     try:
-        python_exe = get_system_python()
+        python_exe = get_system_python(version)
+
+        if python_exe is None and version:
+            print(f"No Python {version} installation with venv support found. See 'python --list'.")
+            return False
 
         if python_exe is None:
             print("ERROR: No system Python installation found!")
@@ -65,11 +435,22 @@ def create_venv(path, fs):
         
         print(f"Creating virtual environment using system Python...")
 
-        result = subprocess.run([python_exe, "-m", "venv", abs_path], capture_output=True, text=True)
+        if not TEMPLATES_SUPPORTED:
+            command = [python_exe, "-m", "venv", abs_path]
+            if mode:
+                command.insert(3, f"--{mode}")
 
-        if result.returncode != 0:
-            print(f"Error creating virtual environment: {result.stderr}")
-            return False
+            result = subprocess.run(command, capture_output=True, text=True)
+
+            if result.returncode != 0:
+                print(f"Error creating virtual environment: {result.stderr}")
+                return False
+
+        else:
+            template = get_venv_template(python_exe, mode or "symlinks")
+            # A real copy: site-packages is edited in place by pip and users, so venvs must not share files
+            shutil.copytree(template, abs_path, symlinks=True)
+            relocate_venv(abs_path, template, abs_path, prompt=os.path.basename(abs_path))
 
         packages_file = os.path.join(abs_path, "lib", "packages.json")
         os.makedirs(os.path.dirname(packages_file), exist_ok=True)
@@ -92,45 +473,172 @@ def deactivate_venv(fs):
         print(f"Deactivated virtual environment: {rel_path}")
         current_venv = None
         save_current_venv()
+        fs.refresh_venv_info()
         return True
     
     else:
         print("No virtual environment is currently active.")
         return False
     
-def get_python():
-    if current_venv:
-        if not getattr(sys, 'frozen', False):
-            path = os.path.join(current_venv, "Scripts", "python.exe")
+def venv_python(venv): # Interpreter inside a venv, looked up once per venv
+    if venv not in venv_pythons:
+        for candidate in (os.path.join(venv, "Scripts", "python.exe"), os.path.join(venv, "bin", "python")):
+            if os.path.exists(candidate):
+                venv_pythons[venv] = candidate
+                break
 
-        if os.path.exists(path):
-            return path
-        
-        path = os.path.join(current_venv, "bin", "python")
-        if os.path.exists(path):
+        else:
+            return None
+
+    return venv_pythons[venv]
+
+def path_signature(path):
+    try:
+        info = os.stat(path)
+        return [info.st_mtime_ns, info.st_size]
+
+    except OSError:
+        return None
+
+def search_dirs():
+    return [directory for directory in os.environ.get("PATH", "").split(os.pathsep) if directory]
+
+def probe_interpreter(path): # The only subprocess: run once per new or changed interpreter
+    try:
+        result = subprocess.run([path, "-c", PROBE_SOURCE], capture_output=True, text=True, timeout=5)
+
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+
+    if result.returncode != 0:
+        return None
+
+    try:
+        return json.loads(result.stdout)
+
+    except json.JSONDecodeError:
+        return None
+
+def discover_interpreters(previous): # One scandir per PATH directory, probes only what changed
+    found = {}
+    order = 0
+
+    for directory in search_dirs():
+        if "WindowsApps" in directory or "Microsoft" in directory:
+            continue
+
+        try:
+            with os.scandir(directory) as entries:
+                names = [entry.name for entry in entries if PYTHON_NAME.match(entry.name)]
+
+        except OSError:
+            continue
+
+        for name in sorted(names, key=lambda name: (len(name), name)): # python, python3, python3.11, ...
+            path = os.path.join(directory, name)
+            real_path = os.path.realpath(path)
+            signature = path_signature(real_path)
+
+            if signature is None or real_path in found:
+                continue
+
+            info = previous.get(real_path)
+            if not info or info.get("signature") != signature:
+                probed = probe_interpreter(path)
+                if not probed:
+                    continue
+
+                info = dict(probed, signature=signature)
+
+            info = dict(info, path=path, order=order)
+            found[real_path] = info
+            order += 1
+
+    return found
+
+def load_interpreters(): # Registry of interpreters on PATH, persisted in /var and revalidated by mtime
+    global interpreters
+
+    dirs = search_dirs()
+    dir_signatures = {directory: path_signature(directory) for directory in dirs}
+
+    if interpreters is not None and interpreters["dirs"] == dir_signatures:
+        return interpreters["found"]
+
+    registry = {"dirs": {}, "found": {}}
+    if os.path.exists(INTERPRETERS_FILE):
+        try:
+            with open(INTERPRETERS_FILE, 'r', encoding='utf-8') as file:
+                registry = json.load(file)
+
+        except (json.JSONDecodeError, IOError):
+            pass
+
+    unchanged = registry.get("dirs") == dir_signatures and all(
+        path_signature(real_path) == info.get("signature") for real_path, info in registry.get("found", {}).items()
+    )
+
+    if not unchanged:
+        registry = {"dirs": dir_signatures, "found": discover_interpreters(registry.get("found", {}))}
+
+        try:
+            os.makedirs(os.path.dirname(INTERPRETERS_FILE), exist_ok=True)
+            with open(INTERPRETERS_FILE, 'w', encoding='utf-8') as file:
+                json.dump(registry, file, indent=2)
+
+        except OSError:
+            pass
+
+    interpreters = registry
+    return registry["found"]
+
+def version_key(info):
+    return tuple(int(part) for part in info["version"].split("."))
+
+def find_interpreter(version=None, need_venv=False): # Path of the best match, no probing when the registry is current
+    candidates = [info for info in load_interpreters().values() if not need_venv or info.get("venv")]
+
+    if version:
+        candidates = [info for info in candidates if (info["version"] + ".").startswith(version + ".")]
+        candidates.sort(key=version_key, reverse=True) # "3" picks the newest 3.x
+
+    else:
+        candidates.sort(key=lambda info: info["order"]) # First on PATH, like the shell would pick
+
+    if not candidates:
+        return None
+
+    return candidates[0]["path"]
+
+def list_interpreters():
+    found = sorted(load_interpreters().values(), key=lambda info: info["order"])
+
+    if not found:
+        print("No Python interpreters found on PATH.")
+        return
+
+    default = found[0]["path"]
+
+    for info in found:
+        marker = "*" if info["path"] == default else " "
+        capabilities = ", ".join(name for name in ("venv", "pip") if info.get(name)) or "none"
+        print(f"{marker} {info['implementation']} {info['version']:<10} {info['path']} ({capabilities})")
+
+def get_python(version=None):
+    if current_venv and not version:
+        path = venv_python(current_venv)
+        if path:
             return path
-    
+
+    if version or getattr(sys, 'frozen', False):
+        return find_interpreter(version)
+
     return sys.executable
 
-def get_system_python():
-    pys = ['python', 'python3', 'python.exe']
-
-    for py in pys:
-        python_exe = shutil.which(py)
-        if python_exe:
-            if "WindowsApps" not in python_exe:
-                if "Microsoft" not in python_exe:
-                    try:
-                        result = subprocess.run([python_exe, "--version"], capture_output=True, text=True, timeout=5)
-                        if result.returncode == 0 and "Python" in result.stdout:
-                            return python_exe
-                    
-                    except:
-                        continue
-    
-    return None
+def get_system_python(version=None):
+    return find_interpreter(version, need_venv=True)
 
-def run_python_file(file_path, fs, args=None):
+def run_python_file(file_path, fs, args=None, version=None):
     if args is None:
         args = []
 
@@ -149,45 +657,30 @@ def run_python_file(file_path, fs, args=None):
         return False
     
     try:
-        if current_venv:
-            venv_python = None
+        if current_venv and not version:
+            python_exe = venv_python(current_venv)
 
-            venv_scripts = os.path.join(current_venv, 'Scripts', 'python.exe')
-
-            if os.path.exists(venv_scripts):
-                venv_python = venv_scripts
-
-            else:
-                venv_bin = os.path.join(current_venv, 'bin', 'python')
-                if os.path.exists(venv_bin):
-                    venv_python = venv_bin
-
-            if venv_python:
-                command = [venv_python, abs_path] + args
-                env = os.environ.copy()
-                env['VIRTUAL_ENV'] = current_venv
-                venv_dir = os.path.dirname(venv_python)
-                env['PATH'] = venv_dir + os.pathsep + env.get('PATH', '')
-
-                result = subprocess.run(command, env=env)
-                return result.returncode == 0
+            if python_exe:
+                return run_pooled(python_exe, current_venv, abs_path, args) == 0
             
             else:
                 print("ERROR: Virtual environment Python interpreter not found!")
                 return False
         
-        if getattr(sys, 'frozen', False):
+        if getattr(sys, 'frozen', False) and not version:
             return run_python_in(abs_path, args)
         
-        py = get_python()
+        py = get_python(version)
+
+        if py is None and version:
+            print(f"Python {version} not found. See 'python --list'.")
+            return False
 
         if py is None:
             print("ERROR: Python interpreter not found!")
             return False
         
-        command = [py, abs_path] + args
-        result = subprocess.run(command)
-        return result.returncode == 0
+        return run_pooled(py, None, abs_path, args) == 0
         
     except Exception as e:
         print(f"Error running Python file: {e}")
@@ -198,8 +691,7 @@ def run_python_in(file_path, args):
         old_argv = sys.argv
         sys.argv = [file_path] + args
 
-        with open(file_path, 'r', encoding='utf-8') as file:
-            code = file.read()
+        code = code_cache.load_code(file_path) # Compiled once per file version, not on every run
 
         file_globals = {'__file__': file_path, '__name__': '__main__', '__builtins__': __builtins__}
 
@@ -227,6 +719,23 @@ def run(args, fs):
     if args[0] == "deactivate":
         deactivate_venv(fs)
         return
+
+    if args[0] == "--pool-stats":
+        print_pool_stats()
+        return
+
+    if args[0] == "--list":
+        list_interpreters()
+        return
+
+    version = None
+    if re.match(r"^-\d+(\.\d+)*$", args[0]): # python -3.11 ..., like the py launcher
+        version = args[0][1:]
+        args = args[1:]
+
+        if not args:
+            print("Invalid operand.")
+            return
     
     if args[0] == "-m":
         if len(args) < 2:
@@ -236,12 +745,19 @@ def run(args, fs):
         module_name = args[1]
 
         if module_name == "venv":
-            if len(args) < 3:
+            mode = None
+            if "--copies" in args:
+                mode = "copies"
+            elif "--symlinks" in args:
+                mode = "symlinks"
+
+            venv_args = [arg for arg in args[2:] if arg not in ("--copies", "--symlinks")]
+
+            if not venv_args:
                 print("Specify a path for the virtual environment.")
                 return
             
-            create_venv(args[2], fs)
-            return
+            return create_venv(venv_args[0], fs, version, mode)
         
     path = args[0]
     if len(args) > 1:
@@ -249,4 +765,4 @@ def run(args, fs):
     else:
         file_args = []
     
-    run_python_file(path, fs, file_args)
+    return run_python_file(path, fs, file_args, version)
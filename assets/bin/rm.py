@@ -1,36 +1,239 @@
 # Command to remove files or directories.
-# Usage: rm [-r] <file or directory1> <file or directory2> ...
-# Version: 1.0.0
+# Usage: rm [-r, --trash] <file or directory1> <file or directory2> ... / rm --undo / rm --empty-trash [--all]
+# Version: 1.1.2
 
 import os
+import json
+import time
 import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import auth
+
+MAX_WORKERS = 8
+TRASH_RETENTION = 7 * 24 * 3600 # Trashed items older than this are purged in the background
+TRASH_INFO = ".trashinfo.json"
+
+def trash_root(fs):
+    return os.path.join(fs.ROOT_DIR, "var", "trash")
+
+def trash_dir(fs, user=None): # Every user has their own trash, /var/trash/<user>
+    return os.path.join(trash_root(fs), user or auth.get_current_user())
+
+def create_batch(fs): # A new, private batch directory named after the current time in ms
+    root = trash_dir(fs)
+    os.makedirs(root, exist_ok=True)
+
+    user = auth.get_current_user()
+    virtual_root = fs.rel_path(root)
+    rule = auth.load_permissions().get(virtual_root)
+    if not rule or rule.get("owner") != user: # Trashed files lose their own rules, the trash keeps them private
+        auth.update_permissions(virtual_root, user)
+
+    name = int(time.time() * 1000)
+    while True:
+        batch = os.path.join(root, str(name))
+        try:
+            os.mkdir(batch)
+            return batch
+
+        except FileExistsError: # Another rm --trash in the same millisecond
+            name += 1
+
+def remove_tree(path): # Fan out over the top-level subtrees, then remove what is left
+    subdirs = []
+
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append(entry.path)
+            else:
+                os.remove(entry.path)
+
+    if subdirs:
+        with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(subdirs))) as executor:
+            list(executor.map(shutil.rmtree, subdirs))
+
+    os.rmdir(path)
+
+def move_to_trash(paths, fs): # O(1) per item: a rename into a new batch under /var/trash
+    batch = create_batch(fs)
+    items = []
+    moved = []
+
+    try:
+        for index, path in enumerate(paths):
+            stored_name = f"{index}-{os.path.basename(path)}"
+            os.rename(path, os.path.join(batch, stored_name))
+            items.append({"name": stored_name, "original": fs.rel_path(path)})
+            moved.append(path)
+
+    finally: # Record whatever was moved, even if a later rename failed, so undo can bring it back
+        rules = auth.remove_permissions_many(moved) if moved else {}
+
+        with open(os.path.join(batch, TRASH_INFO), 'w') as file:
+            json.dump({"time": time.time(), "owner": auth.get_current_user(), "items": items, "rules": rules}, file, indent=2)
+
+def rules_below(rules, virtual_path):
+    return {path: rule for path, rule in rules.items() if path == virtual_path or path.startswith(virtual_path + "/")}
+
+def undo(fs): # Restore the most recent trash batch, items that cannot be restored stay in it
+    root = trash_dir(fs)
+    batches = []
+
+    if os.path.isdir(root):
+        batches = sorted((name for name in os.listdir(root) if name.isdigit()), key=int)
+
+    if not batches:
+        print("Nothing to undo.")
+        return
+
+    batch = os.path.join(root, batches[-1])
+
+    try:
+        with open(os.path.join(batch, TRASH_INFO), 'r') as file:
+            info = json.load(file)
+
+    except (json.JSONDecodeError, IOError):
+        print("Trash batch is damaged, cannot undo.")
+        return
+
+    rules = info.get("rules", {})
+    restored_rules = {}
+    remaining = []
+
+    for item in info["items"]:
+        original = fs.abs_path(item["original"])
+
+        if os.path.lexists(original):
+            print(f"Cannot restore '{item['original']}': File exists")
+            remaining.append(item)
+            continue
+
+        try:
+            os.rename(os.path.join(batch, item["name"]), original)
+
+        except OSError as e:
+            print(f"Cannot restore '{item['original']}': {e.strerror}")
+            remaining.append(item)
+            continue
+
+        restored_rules.update(rules_below(rules, item["original"]))
+        print(f"Restored: {item['original']}")
+
+    auth.restore_permissions(restored_rules)
+
+    if not remaining:
+        shutil.rmtree(batch, ignore_errors=True)
+        return
+
+    info["items"] = remaining
+    info["rules"] = {path: rule for path, rule in rules.items() if path not in restored_rules}
+
+    with open(os.path.join(batch, TRASH_INFO), 'w') as file:
+        json.dump(info, file, indent=2)
+
+    print(f"{len(remaining)} item(s) left in the trash.")
+
+def purge_trash(root, retention):
+    if not os.path.isdir(root):
+        return
+
+    cutoff = (time.time() - retention) * 1000
+
+    for name in os.listdir(root):
+        if name.isdigit() and int(name) <= cutoff:
+            shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+
+def purge_expired(fs): # Retention applies to every user's trash
+    root = trash_root(fs)
+    if not os.path.isdir(root):
+        return
+
+    for user in os.listdir(root):
+        purge_trash(os.path.join(root, user), TRASH_RETENTION)
+
+def start_purge(fs): # Old trash is removed on a background thread, rm itself never waits for it
+    thread = threading.Thread(target=purge_expired, args=(fs,), daemon=True)
+    thread.start()
+
+def empty_trash(fs, all_users):
+    if not all_users:
+        purge_trash(trash_dir(fs), 0)
+        print("Trash emptied.")
+        return
+
+    if not auth.is_current_root():
+        print("Permission denied: only root can empty every user's trash.")
+        return
+
+    root = trash_root(fs)
+    if os.path.isdir(root):
+        for user in os.listdir(root):
+            purge_trash(os.path.join(root, user), 0)
+
+    print("Trash emptied for all users.")
 
 def run(args, fs):
     if not args:
         print("Missing operand.")
         return
 
+    if "--undo" in args:
+        undo(fs)
+        return
+
+    if "--empty-trash" in args:
+        empty_trash(fs, "--all" in args)
+        return
+
     recursive = '-r' in args
-    if recursive:
-        args.remove('-r')
+    use_trash = '--trash' in args
+    args = [arg for arg in args if arg not in ('-r', '--trash')]
+
+    start_purge(fs)
+
+    paths = fs.abs_paths(args)
+    removed = []
+    to_trash = []
 
-    for item in args:
-        path = fs.abs_path(item)
+    for item, path in zip(args, paths):
         try:
-            if os.path.isfile(path):
+            if path == fs.ROOT_DIR or path == trash_root(fs) or path.startswith(trash_root(fs) + os.sep):
+                print(f"Cannot remove '{item}': Refusing to remove this directory")
+
+            elif not os.path.lexists(path):
+                print(f"Cannot remove '{item}': No such file or directory")
+
+            elif os.path.isdir(path) and not os.path.islink(path) and not recursive:
+                print(f"Cannot remove '{item}': Is a directory")
+
+            elif not auth.check_subtree_permissions(path, action="write"):
+                print(f"Cannot remove '{item}': Permission denied")
+
+            elif use_trash:
+                to_trash.append(path)
+
+            elif os.path.isdir(path) and not os.path.islink(path):
+                remove_tree(path)
+                removed.append(path)
+                print(f"Removed directory: {fs.rel_path(path)}")
+
+            else:
                 os.remove(path)
+                removed.append(path)
                 print(f"Removed file: {fs.rel_path(path)}")
 
-            elif os.path.isdir(path):
-                if recursive:
-                    shutil.rmtree(path)
-                    print(f"Removed directory: {fs.rel_path(path)}")
+        except Exception as e:
+            print(f"Error: {e}")
+
+    if to_trash:
+        try:
+            move_to_trash(to_trash, fs)
+            print(f"Moved {len(to_trash)} item(s) to trash. Use 'rm --undo' to restore.")
 
-                else:
-                    print(f"Cannot remove '{item}': Is a directory")
-            
-            else:
-                print(f"Cannot remove '{item}': No such file or directory")
-        
         except Exception as e:
             print(f"Error: {e}")
+
+    if removed:
+        auth.remove_permissions_many(removed) # One write for every removed path
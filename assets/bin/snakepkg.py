@@ -1,6 +1,6 @@
 # Command line utility for Snake Package Manager.
-# Usage: sudo snakepkg <install/remove/upgrade/list/available/info> <package_name>
-# Version: 1.0.0
+# Usage: sudo snakepkg <install/remove/upgrade/update/mirror/list/available/info> <package_name> [<package_name> ...]
+# Version: 1.3.0
 
 import os
 import sys
@@ -19,10 +19,10 @@ def run(args, fs):
             print("Missing package name.")
             return
         
-        package_name = args[1]
-        question = input(f"Do you want to install the package '{package_name}'? (Y/n): ")
+        package_names = args[1:]
+        question = input(f"Do you want to install {', '.join(package_names)}? (Y/n): ")
         if question.lower() in ['y', 'yes', '']:
-            package_manager.install_package(package_name)
+            package_manager.install_packages(package_names)
 
     elif command == "remove":
         if len(args) < 2:
@@ -42,6 +42,22 @@ def run(args, fs):
             package_name = args[1]
             package_manager.upgrade_package(package_name)
     
+    elif command == "update":
+        package_manager.refresh_package_list()
+
+    elif command == "mirror":
+        if len(args) < 2:
+            print("Missing mirror directory.")
+            return
+
+        destination = fs.abs_path(args[1])
+
+        if not auth.check_permissions(destination, action="write"):
+            print("Permission denied.")
+            return
+
+        package_manager.mirror_repository(destination)
+
     elif command == "list":
         package_manager.list_installed_packages()
 
@@ -50,7 +66,7 @@ def run(args, fs):
 
     elif command == "info":
         print("PyOs Package Manager - Version 1.0")
-        print("Package Manager Commands: install, remove, upgrade, list, available, info")
+        print("Package Manager Commands: install, remove, upgrade, update, mirror, list, available, info")
 
     else:
         print(f"Unknown command: {command}.")
@@ -1,6 +1,6 @@
 # Command to execute a shell command.
 # Usage: source <file_path>
-# Version: 1.0.0
+# Version: 1.0.1
 
 import os
 import json
@@ -33,6 +33,7 @@ def activate_virtualenv(venv_path, fs):
                 "venv_name": os.path.basename(venv_path)
             }, file)
 
+        fs.refresh_venv_info()
         print(f"Activated virtual environment: {fs.rel_path(venv_path)}")
         print("Use 'python deactivate' to deactivate the virtual environment")
         return True
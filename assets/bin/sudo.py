@@ -1,31 +1,10 @@
 # Command to run a command with elevated privileges.
 # Usage: sudo <command> [args...]
-# Version: 1.0.1
+# Version: 1.0.2
 
-import importlib
 import auth
 import getpass
-import os
-import sys
-import importlib.util
-
-def load_module(name):
-    module_name = f"pyos_cmd_{name}"
-    command_path = os.path.abspath(os.path.join("fs", "bin", f"{name}.py"))
-    
-    if not os.path.exists(command_path):
-        return None
-    
-    if module_name in sys.modules:
-        del sys.modules[module_name]
-
-    spec = importlib.util.spec_from_file_location(module_name, command_path)
-    if not spec or not spec.loader:
-        return None
-    
-    module = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(module)
-    return module
+import shell
 
 def run(args, fs):
     if not args:
@@ -48,7 +27,7 @@ def run(args, fs):
     try:
         command_name = args[0]
         command_args = args[1:]
-        command_module = load_module(command_name)
+        command_module = shell.load_module(command_name)
 
         if not command_module:
             print(f"Unknown command: {command_name}")
@@ -0,0 +1,136 @@
+# Command to display the last lines of files.
+# Usage: tail [-n <count>, -c <bytes>] [file1 file2 ...] / <command> | tail [-n <count>, -c <bytes>]
+# Version: 1.0.2
+
+import os
+import collections
+import text_stream
+
+BLOCK_SIZE = 64 * 1024
+
+def parse_args(args): # Returns (mode, count, files) or None, mode is 'n' (lines) or 'c' (bytes)
+    mode = 'n'
+    count = 10
+    files = []
+    i = 0
+
+    while i < len(args):
+        if args[i] in ('-n', '-c'):
+            try:
+                count = int(args[i + 1])
+
+            except (IndexError, ValueError):
+                print("Invalid count.")
+                return None
+
+            mode = args[i][1]
+            i += 2
+            continue
+
+        files.append(args[i])
+        i += 1
+
+    return mode, count, files
+
+def tail_bytes(path, count): # Seek straight to the last count bytes
+    with open(path, 'rb') as file:
+        size = os.fstat(file.fileno()).st_size
+        file.seek(max(0, size - count))
+        return file.read()
+
+def tail_lines(path, count): # Read blocks backwards from the end until enough newlines are found
+    if count <= 0:
+        return []
+
+    with open(path, 'rb') as file:
+        position = os.fstat(file.fileno()).st_size
+        blocks = []
+        newlines = 0
+        trailing = None
+
+        while position > 0 and newlines <= count:
+            step = min(BLOCK_SIZE, position)
+            position -= step
+            file.seek(position)
+            block = file.read(step)
+
+            if trailing is None: # A final newline ends the last line, it does not start a new one
+                trailing = block.endswith(b"\n")
+
+            blocks.append(block)
+            newlines += block.count(b"\n")
+
+    data = b"".join(reversed(blocks))
+    if not data: # Empty file: no lines, not one empty line
+        return []
+
+    if trailing:
+        data = data[:-1]
+
+    lines = data.split(b"\n")[-count:]
+    return [line.decode(errors="replace").rstrip("\r") for line in lines]
+
+def tail_file(name, fs, mode, count): # Returns the lines, or None if the file could not be read
+    path = fs.abs_path(name)
+    try:
+        if mode == 'c':
+            text = tail_bytes(path, count).decode(errors="replace")
+            if not text:
+                return []
+
+            if text.endswith("\n"): # run() ends every line with a newline already
+                text = text[:-1]
+            return [text]
+
+        return tail_lines(path, count)
+
+    except FileNotFoundError:
+        print(f"{name}: File not found.")
+
+    except IsADirectoryError:
+        print(f"{name}: Is a directory")
+
+    return None
+
+def run_stream(args, fs, stdin):
+    parsed = parse_args(list(args))
+    if parsed is None:
+        return False
+
+    mode, count, files = parsed
+
+    if not files:
+        if stdin is None:
+            print("No file specified.")
+            return False
+
+        if count <= 0:
+            return
+
+        if mode == 'c':
+            text = "\n".join(stdin)[-count:]
+            if text:
+                yield text
+            return
+
+        yield from collections.deque(stdin, maxlen=count) # Only the last count lines are kept in memory
+        return
+
+    ok = True
+
+    for index, name in enumerate(files):
+        if len(files) > 1:
+            if index:
+                yield ""
+            yield f"==> {name} <=="
+
+        lines = tail_file(name, fs, mode, count)
+        if lines is None:
+            ok = False
+        else:
+            yield from lines
+
+    return ok
+
+def run(args, fs):
+    return text_stream.write_lines(run_stream(args, fs, None))
@@ -1,6 +1,6 @@
 # Command to create empty files or update timestamps.
 # Usage: touch <file1> <file2> ...
-# Version: 1.0.0
+# Version: 1.0.1
 
 import os
 
@@ -9,8 +9,7 @@ def run(args, fs):
         print("Missing file operand.")
         return
     
-    for name in args:
-        path = fs.abs_path(name)
+    for name, path in zip(args, fs.abs_paths(args)):
         try:
             with open(path, 'a'):
                 os.utime(path, None)
@@ -1,52 +1,233 @@
 # Command to display the directory tree structure.
-# Usage: tree [directory]
-# Version: 1.0.0
+# Usage: tree [-d, -L <depth>, --filelimit <n>, --du, -h] [directory]
+# Version: 1.1.0
 
 import os
+import sys
 
-def run(args, fs):
-    def print_tree(path, prefix=""):
-        items = sorted(os.listdir(path))
-        
-        directories = []
-        files = []
-        for item in items:
-            item_path = os.path.join(path, item)
-            if os.path.isdir(item_path):
-                directories.append(item)
-            else:
-                files.append(item)
-        
-        all_items = directories + files
-        
-        for i, item in enumerate(all_items):
-            is_last = (i == len(all_items) - 1)
-            
-            if is_last:
-                current_prefix = "└── "
-                next_prefix = "    "
+BLOCK_LINES = 1024 # Lines buffered before each write to stdout
+
+def human_size(size):
+    for unit in ("", "K", "M", "G", "T"):
+        if size < 1024 or unit == "T":
+            if unit == "":
+                return str(size)
+            return f"{size:.1f}{unit}"
+
+        size /= 1024
+
+def parse_args(args):
+    options = {"dirs_only": False, "max_depth": None, "file_limit": None, "du": False, "human": False, "path": None}
+    i = 0
+
+    while i < len(args):
+        arg = args[i]
+
+        if arg == "-d":
+            options["dirs_only"] = True
 
+        elif arg == "--du":
+            options["du"] = True
+
+        elif arg == "-h":
+            options["human"] = True
+
+        elif arg in ("-L", "--filelimit"):
+            try:
+                value = int(args[i + 1])
+
+            except (IndexError, ValueError):
+                print(f"Invalid argument to '{arg}'.")
+                return None
+
+            if arg == "-L":
+                options["max_depth"] = value
             else:
-                current_prefix = "├── "
-                next_prefix = "│   "
+                options["file_limit"] = value
+
+            i += 1
+
+        else:
+            options["path"] = arg
+
+        i += 1
 
-            item_path = os.path.join(path, item)
-            if os.path.isdir(item_path):
-                item += "/"
+    return options
+
+def list_children(path, dirs_only): # One scandir per directory: directories first, then files
+    directories = []
+    files = []
+
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                directories.append(entry)
+            elif not dirs_only:
+                files.append(entry)
+
+    directories.sort(key=lambda entry: entry.name)
+    files.sort(key=lambda entry: entry.name)
+    return directories + files
+
+def directory_sizes(start, listings): # Post-order totals for --du, listings are kept for rendering
+    sizes = {}
+    stack = [(start, False)]
+
+    while stack:
+        path, visited = stack.pop()
+
+        if not visited:
+            try:
+                listings[path] = list_children(path, False)
+
+            except OSError:
+                listings[path] = []
+
+            stack.append((path, True))
+            for entry in listings[path]:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append((entry.path, False))
+            continue
+
+        total = 0
+        for entry in listings[path]:
+            if entry.is_dir(follow_symlinks=False):
+                total += sizes.get(entry.path, 0)
             else:
-                item = item
+                try:
+                    total += entry.stat(follow_symlinks=False).st_size
+                except OSError:
+                    pass
+
+        sizes[path] = total
+
+    return sizes
+
+def run(args, fs):
+    options = parse_args(args)
+    if options is None:
+        return
 
-            print(prefix + current_prefix + item)
-            
-            if os.path.isdir(item_path):
-                print_tree(item_path, prefix + next_prefix)
-    
     start_path = fs.current_dir
-    if args:
-        start_path = fs.abs_path(args[0])
+    if options["path"]:
+        start_path = fs.abs_path(options["path"])
         if not os.path.isdir(start_path):
             print("Not a directory:", fs.rel_path(start_path))
             return
-    
-    print(os.path.basename(start_path))
-    print_tree(start_path)
+
+    listings = {}
+    sizes = {}
+    if options["du"]:
+        sizes = directory_sizes(start_path, listings)
+
+    def children(path):
+        if path in listings:
+            items = listings[path]
+            if options["dirs_only"]:
+                items = [entry for entry in items if entry.is_dir(follow_symlinks=False)]
+            return items
+
+        return list_children(path, options["dirs_only"])
+
+    def size_tag(entry, is_dir):
+        if not options["du"]:
+            return ""
+
+        if is_dir:
+            size = sizes.get(entry.path, 0)
+        else:
+            size = entry.stat(follow_symlinks=False).st_size
+
+        if options["human"]:
+            return f"[{human_size(size):>6}]  "
+        return f"[{size:>10}]  "
+
+    buffer = []
+
+    def emit(line):
+        buffer.append(line)
+        if len(buffer) >= BLOCK_LINES:
+            sys.stdout.write("\n".join(buffer) + "\n")
+            buffer.clear()
+
+    if options["du"]:
+        root_size = sizes.get(start_path, 0)
+        root_tag = f"[{human_size(root_size)}]  " if options["human"] else f"[{root_size}]  "
+        emit(root_tag + os.path.basename(start_path))
+    else:
+        emit(os.path.basename(start_path))
+
+    directory_count = 0
+    file_count = 0
+
+    try:
+        stack = [[children(start_path), 0, ""]] # Explicit stack instead of recursion: [items, next index, prefix]
+    except OSError as e:
+        print(f"Cannot open directory: {e.strerror}")
+        return
+
+    while stack:
+        frame = stack[-1]
+        items, index, prefix = frame
+
+        if index >= len(items):
+            stack.pop()
+            continue
+
+        frame[1] += 1
+        entry = items[index]
+        is_last = (index == len(items) - 1)
+
+        if is_last:
+            current_prefix = "└── "
+            next_prefix = "    "
+
+        else:
+            current_prefix = "├── "
+            next_prefix = "│   "
+
+        is_dir = entry.is_dir(follow_symlinks=False)
+
+        try:
+            line = prefix + current_prefix + size_tag(entry, is_dir)
+        except OSError:
+            line = prefix + current_prefix
+
+        if not is_dir:
+            file_count += 1
+            emit(line + entry.name)
+            continue
+
+        directory_count += 1
+        line += entry.name + "/"
+
+        if options["max_depth"] is not None and len(stack) >= options["max_depth"]:
+            emit(line)
+            continue
+
+        try:
+            sub_items = children(entry.path)
+
+        except OSError:
+            emit(line + "  [error opening dir]")
+            continue
+
+        if options["file_limit"] is not None and len(sub_items) > options["file_limit"]:
+            emit(line + f"  [{len(sub_items)} entries exceeds filelimit, not opening dir]")
+            continue
+
+        emit(line)
+        stack.append([sub_items, 0, prefix + next_prefix])
+
+    summary = f"{directory_count} directories"
+    if not options["dirs_only"]:
+        summary += f", {file_count} files"
+
+    if options["du"]:
+        total = sizes.get(start_path, 0)
+        used = human_size(total) if options["human"] else str(total)
+        summary = f"{used} used in {summary}"
+
+    emit("")
+    emit(summary)
+    sys.stdout.write("\n".join(buffer) + "\n")
@@ -1,7 +1,14 @@
 import time
 import sys
 import os
+
+FAST_BOOT = os.environ.get("PYOS_FAST_BOOT") == "1"
+boot_start = globals().get("BOOT_START", time.perf_counter())
+boot_timings = globals().get("BOOT_TIMINGS", {})
+
+stage_start = time.perf_counter()
 from shell import shell
+boot_timings["import shell"] = time.perf_counter() - stage_start
 
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'commands'))
 
@@ -31,7 +38,18 @@ def display_ascii_art():
     """
     print(f"\033[1;36m{art}\033[0m")
 
+def print_boot_times(): # Measured boot-time breakdown, so startup regressions are visible
+    total = time.perf_counter() - boot_start
+    stages = ", ".join(f"{name} {seconds:.3f}s" for name, seconds in boot_timings.items())
+    print(f"Boot time: {total:.3f}s ({stages})")
+
 def boot():
+    if FAST_BOOT: # No splash, no sleeps, no subprocess clears
+        print("\033[1;32mPyOS Booted Successfully!\033[0m")
+        print_boot_times()
+        print()
+        return
+
     display_ascii_art()
     print("\033[1;32mWelcome to PyOS...\033[0m")
     print("Initializing, please wait...")
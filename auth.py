@@ -11,13 +11,20 @@ ROOT_DIR = os.path.abspath(FILE_SYSTEM)
 PASSWD_FILE = os.path.join(ROOT_DIR, "etc", "passwd")
 SHADOW_FILE = os.path.join(ROOT_DIR, "etc", "shadow")
 PERMISSIONS_FILE = os.path.join(ROOT_DIR, "etc", "permissions.json")
-SESSIONS_FILE = os.path.join(ROOT_DIR, "var", "sessions.json")
+SESSIONS_FILE = os.path.join(ROOT_DIR, "var", "sessions.json") # Legacy format, migrated on first use
+SESSIONS_JOURNAL = os.path.join(ROOT_DIR, "var", "sessions.jsonl")
+SESSIONS_INDEX = os.path.join(ROOT_DIR, "var", "sessions_index.json")
+SESSIONS_JOURNAL_MAX_SIZE = 1024 * 1024 # Rotate the journal once it grows past 1 MB
+SESSIONS_JOURNAL_BACKUPS = 3
 CURRENT_SESSION_FILE = os.path.join(ROOT_DIR, "var", "current_session.pkl")
 
 current_user = None
 current_uid = None
 is_root = False
 
+permissions_index = None # In-process copy of permissions.json: virtual path -> rule
+permissions_signature = None
+
 
 def hash_password(password):
     return hashlib.sha256(password.encode()).hexdigest()
@@ -91,7 +98,7 @@ def save_session():
         pickle.dump(session_data, file)
 
 
-def load_session():
+def load_session(quiet=False):
     global current_user, current_uid, is_root
 
     if os.path.exists(CURRENT_SESSION_FILE):
@@ -104,7 +111,8 @@ def load_session():
             is_root = session_data.get('is_root', False)
 
             if current_user != "root":
-                print(f"Welcome back, {current_user}!")
+                if not quiet:
+                    print(f"Welcome back, {current_user}!")
                 return True
         
         except:
@@ -118,26 +126,171 @@ def clear_session():
         os.remove(CURRENT_SESSION_FILE)
 
 
-def log_session(username, action):
-    sessions = {}
-    
-    if os.path.exists(SESSIONS_FILE):
+def load_sessions_index():
+    if os.path.exists(SESSIONS_INDEX):
+        try:
+            with open(SESSIONS_INDEX, 'r') as file:
+                return json.load(file)
+
+        except (json.JSONDecodeError, IOError):
+            return rebuild_sessions_index()
+
+    if journal_files(): # Index lost but the journal is still there
+        return rebuild_sessions_index()
+
+    return {}
+
+
+def save_sessions_index(index):
+    temp_file = SESSIONS_INDEX + ".tmp"
+
+    with open(temp_file, 'w') as file:
+        json.dump(index, file)
+
+    os.replace(temp_file, SESSIONS_INDEX)
+
+
+def index_session(index, entry): # Keep only what last-login and who-is-online queries need
+    user_index = index.setdefault(entry['username'], {'last_action': None, 'last_login': None})
+    user_index['last_action'] = entry['action']
+
+    if entry['action'] == 'login':
+        user_index['last_login'] = entry['timestamp']
+
+
+def journal_files(): # Rotated journals first, oldest to newest
+    files = []
+
+    for number in range(SESSIONS_JOURNAL_BACKUPS, 0, -1):
+        path = f"{SESSIONS_JOURNAL}.{number}"
+        if os.path.exists(path):
+            files.append(path)
+
+    if os.path.exists(SESSIONS_JOURNAL):
+        files.append(SESSIONS_JOURNAL)
+
+    return files
+
+
+def rebuild_sessions_index(): # Recover the index from the journal if it is missing or corrupt
+    index = {}
+
+    for path in journal_files():
+        with open(path, 'r') as file:
+            for line in file:
+                try:
+                    index_session(index, json.loads(line))
+
+                except (json.JSONDecodeError, KeyError):
+                    continue
+
+    save_sessions_index(index)
+    return index
+
+
+def migrate_sessions(): # One-time conversion of the old sessions.json into the journal
+    if not os.path.exists(SESSIONS_FILE):
+        return
+
+    try:
         with open(SESSIONS_FILE, 'r') as file:
             sessions = json.load(file)
-    
-    if username not in sessions:
-        sessions[username] = []
+
+    except (json.JSONDecodeError, IOError):
+        sessions = {}
+
+    entries = []
+    for username, logs in sessions.items():
+        for entry in logs:
+            entries.append({
+                'username': username,
+                'action': entry['action'],
+                'timestamp': entry['timestamp']
+            })
+
+    entries.sort(key=lambda x: x['timestamp']) # Stable, so per-user order is kept for equal timestamps
+
+    index = load_sessions_index()
+    with open(SESSIONS_JOURNAL, 'a') as file:
+        for entry in entries:
+            file.write(json.dumps(entry) + "\n")
+            index_session(index, entry)
+
+    save_sessions_index(index)
+    os.replace(SESSIONS_FILE, SESSIONS_FILE + ".migrated")
+
+
+def rotate_sessions_journal():
+    if not os.path.exists(SESSIONS_JOURNAL):
+        return
+
+    if os.path.getsize(SESSIONS_JOURNAL) < SESSIONS_JOURNAL_MAX_SIZE:
+        return
+
+    for number in range(SESSIONS_JOURNAL_BACKUPS - 1, 0, -1):
+        path = f"{SESSIONS_JOURNAL}.{number}"
+        if os.path.exists(path):
+            os.replace(path, f"{SESSIONS_JOURNAL}.{number + 1}")
+
+    os.replace(SESSIONS_JOURNAL, f"{SESSIONS_JOURNAL}.1")
+
+
+def log_session(username, action):
+    migrate_sessions()
+    rotate_sessions_journal()
     
     session_entry = {
         'username': username,
         'action': action,
         'timestamp': time.strftime("%Y-%m-%d %H:%M:%S")
     }
-    
-    sessions[username].append(session_entry)
-    
-    with open(SESSIONS_FILE, 'w') as file:
-        json.dump(sessions, file, indent=2)
+
+    os.makedirs(os.path.dirname(SESSIONS_JOURNAL), exist_ok=True)
+    with open(SESSIONS_JOURNAL, 'a') as file:
+        file.write(json.dumps(session_entry) + "\n")
+
+    index = load_sessions_index()
+    index_session(index, session_entry)
+    save_sessions_index(index)
+
+
+def read_journal_tail(path, count, block_size=8192): # Last lines of a file, reading backwards from the end
+    if count <= 0:
+        return []
+
+    with open(path, 'rb') as file:
+        file.seek(0, os.SEEK_END)
+        position = file.tell()
+        data = b""
+
+        while position > 0 and data.count(b"\n") <= count:
+            step = min(block_size, position)
+            position -= step
+            file.seek(position)
+            data = file.read(step) + data
+
+    lines = data.splitlines()
+    return [line.decode() for line in lines[-count:] if line.strip()]
+
+
+def get_recent_sessions(count=10): # Newest first
+    migrate_sessions()
+    entries = []
+
+    for path in reversed(journal_files()):
+        lines = read_journal_tail(path, count - len(entries))
+
+        for line in reversed(lines):
+            try:
+                entries.append(json.loads(line))
+
+            except json.JSONDecodeError:
+                continue
+
+        if len(entries) >= count:
+            break
+
+    return entries[:count]
 
 
 def login():
@@ -288,8 +441,7 @@ def delete_user(username):
         shutil.rmtree(home_path)
         print(f"Home directory '{home_path}' deleted.")
     
-    with open(PERMISSIONS_FILE, 'r') as perm_file:
-        permissions = json.load(perm_file)
+    permissions = load_permissions()
 
     home_virtual_path = rel_path(home_path)
     updated_permissions = {}
@@ -300,8 +452,7 @@ def delete_user(username):
         if owner != username and not path.startswith(home_virtual_path):
             updated_permissions[path] = info
 
-    with open(PERMISSIONS_FILE, 'w') as perm_file:
-        json.dump(updated_permissions, perm_file, indent=2)
+    save_permissions(updated_permissions)
             
     print(f"User '{username}' deleted successfully.")
 
@@ -351,45 +502,76 @@ def change_password(username = None):
     return True
 
 
-def update_permissions(path, owner):
-    permissions = {}
-    
-    if os.path.exists(PERMISSIONS_FILE):
-        with open(PERMISSIONS_FILE, 'r') as file:
-            permissions = json.load(file)
-    
-    permissions[path] = {
-        'owner': owner,
-        'access': 'private'
-    }
+def file_signature(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def load_permissions(): # Permission index, re-read only when permissions.json changes on disk
+    global permissions_index, permissions_signature
+
+    signature = file_signature(PERMISSIONS_FILE)
+
+    if signature is None:
+        permissions_index = {}
+        permissions_signature = None
+        return permissions_index
+
+    if permissions_index is not None and signature == permissions_signature:
+        return permissions_index
+
+    with open(PERMISSIONS_FILE, 'r') as file:
+        permissions_index = json.load(file)
+
+    permissions_signature = signature
+    return permissions_index
+
+
+def save_permissions(permissions):
+    global permissions_index, permissions_signature
 
     with open(PERMISSIONS_FILE, 'w') as file:
         json.dump(permissions, file, indent=2)
 
+    permissions_index = permissions
+    permissions_signature = file_signature(PERMISSIONS_FILE)
 
-def check_permissions(path, action=None): # TODO: Implement action-based permissions
-    if is_root:
-        return True
 
-    virtual_path = rel_path(path)
+def update_permissions(path, owner):
+    update_permissions_many([path], owner)
 
-    with open(PERMISSIONS_FILE, 'r') as file:
-        permissions = json.load(file)
 
+def update_permissions_many(paths, owner): # Several rules, one write of permissions.json
+    permissions = dict(load_permissions())
+    
+    for path in paths:
+        permissions[path] = {
+            'owner': owner,
+            'access': 'private'
+        }
+
+    save_permissions(permissions)
+
+
+def find_rule(permissions, virtual_path, memo=None): # Closest rule at or above the path, O(depth)
     current_path = virtual_path
-    while True:
-        if current_path in permissions:
-            rule = permissions[current_path]
-            owner = rule.get("owner")
-            access = rule.get("access", "owner-only")
+    visited = []
+    rule = None
 
-            if owner == current_user:
-                return True
+    while True:
+        if memo is not None and current_path in memo:
+            rule = memo[current_path]
+            break
 
-            if access == "public":
-                return True
+        visited.append(current_path)
 
-            return False
+        if current_path in permissions:
+            rule = permissions[current_path]
+            break
 
         parent = os.path.dirname(current_path)
 
@@ -398,7 +580,145 @@ def check_permissions(path, action=None): # TODO: Implement action-based permiss
 
         current_path = parent
 
-    return False
+    if memo is not None:
+        for path in visited:
+            memo[path] = rule
+
+    return rule
+
+
+def copy_permissions(source, destination): # Carry rules under source over to destination, one write
+    permissions = load_permissions()
+    source_path = rel_path(source)
+    destination_path = rel_path(destination)
+
+    copied = {}
+    for path, rule in permissions.items():
+        if path == source_path or path.startswith(source_path.rstrip('/') + '/'):
+            copied[destination_path + path[len(source_path):]] = dict(rule)
+
+    if not copied:
+        return 0
+
+    updated = dict(permissions)
+    updated.update(copied)
+    save_permissions(updated)
+
+    return len(copied)
+
+
+def remove_permissions_many(paths): # Drop rules at or below each removed path, one write
+    permissions = load_permissions()
+    prefixes = set(rel_path(path) for path in paths)
+
+    removed = {}
+    updated = {}
+
+    for path, rule in permissions.items():
+        current_path = path
+
+        while True: # O(depth) per rule: is any ancestor (or the path itself) being removed?
+            if current_path in prefixes:
+                removed[path] = rule
+                break
+
+            parent = os.path.dirname(current_path)
+            if parent == current_path:
+                updated[path] = rule
+                break
+
+            current_path = parent
+
+    if removed:
+        save_permissions(updated)
+
+    return removed
+
+
+def restore_permissions(rules): # Put back rules returned by remove_permissions_many, one write
+    if not rules:
+        return
+
+    updated = dict(load_permissions())
+    updated.update(rules)
+    save_permissions(updated)
+
+
+def lookup_permission(permissions, virtual_path, memo=None):
+    rule = find_rule(permissions, virtual_path, memo)
+
+    if rule is None:
+        return False
+
+    owner = rule.get("owner")
+    access = rule.get("access", "owner-only")
+
+    return owner == current_user or access == "public"
+
+
+def check_permissions(path, action=None): # TODO: Implement action-based permissions
+    if is_root:
+        return True
+
+    return lookup_permission(load_permissions(), rel_path(path))
+
+
+def check_subtree_permissions(path, action=None): # The path and every rule below it must allow access
+    if is_root:
+        return True
+
+    permissions = load_permissions()
+    virtual_path = rel_path(path)
+
+    if not lookup_permission(permissions, virtual_path):
+        return False
+
+    prefix = virtual_path.rstrip('/') + '/'
+
+    for rule_path in permissions:
+        if rule_path.startswith(prefix) and not lookup_permission(permissions, rule_path):
+            return False
+
+    return True
+
+
+def check_permissions_many(paths, action=None): # Bulk check: one index lookup, shared parent results
+    if is_root:
+        return [True] * len(paths)
+
+    permissions = load_permissions()
+    memo = {}
+
+    return [lookup_permission(permissions, rel_path(path), memo) for path in paths]
+
+
+def rule_owner(rule):
+    if rule is None:
+        return "root"
+
+    return rule.get("owner", "root")
+
+
+def get_directory_owners(directory, names): # Entries of one directory: one walk for the parent, O(1) per entry
+    permissions = load_permissions()
+    parent = rel_path(directory)
+    parent_owner = rule_owner(find_rule(permissions, parent))
+
+    if parent == "/":
+        prefix = "/"
+    else:
+        prefix = parent + "/"
+
+    owners = []
+    for name in names:
+        rule = permissions.get(prefix + name)
+
+        if rule is None:
+            owners.append(parent_owner)
+        else:
+            owners.append(rule_owner(rule))
+
+    return owners
 
 
 def sudo_override_root(enable, original_user=None, original_uid=None, original_is_root=None):
@@ -451,40 +771,22 @@ def is_current_root():
 
 
 def get_last_login(username):
-    if os.path.exists(SESSIONS_FILE):
-        with open(SESSIONS_FILE, 'r') as file:
-            sessions = json.load(file)
-        
-        if username in sessions:
-            login_sessions = []
+    migrate_sessions()
+    user_index = load_sessions_index().get(username)
 
-            for session in sessions[username]:
-                if session['action'] == 'login':
-                    login_sessions.append(session)
-
-            if login_sessions:
-                last_login = login_sessions[-1]
-                return last_login['timestamp']
+    if user_index and user_index.get('last_login'):
+        return user_index['last_login']
             
     return 'Never'
 
 
 def get_loggedin_users():
-    if not os.path.exists(SESSIONS_FILE):
-        return []
-
-    with open(SESSIONS_FILE, 'r') as file:
-        sessions = json.load(file)
-
+    migrate_sessions()
     active_users = []
 
-    for username, logs in sessions.items():
-        for entry in reversed(logs):
-            if entry['action'] in ('logout', 'switch_user'):
-                break
-            if entry['action'] == 'login':
-                active_users.append(username)
-                break
+    for username, user_index in load_sessions_index().items():
+        if user_index.get('last_action') == 'login':
+            active_users.append(username)
 
     return active_users
 
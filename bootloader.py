@@ -1,7 +1,9 @@
 import os
 import time
 import sys
+import json
 from os_setup import setup
+import code_cache
 
 sys.dont_write_bytecode = True
 
@@ -11,6 +13,7 @@ if getattr(sys, 'frozen', False):
 else:
     BASE_PATH = os.path.dirname(os.path.abspath(__file__))
 
+START_DIR = os.getcwd()
 os.chdir(BASE_PATH)
 
 FILE_SYSTEM = "fs"
@@ -27,25 +30,81 @@ def load_kernel():
     
     print("Kernel loaded successfully.")
 
+def parse_batch_args(argv): # -c "cmd" / -f script.sh, returns the command lines or None
+    if len(argv) < 2 or argv[0] not in ("-c", "-f"):
+        return None
+
+    if argv[0] == "-c":
+        return argv[1].splitlines()
+
+    script_path = argv[1]
+    if script_path == "-":
+        return sys.stdin
+
+    script_path = os.path.join(START_DIR, script_path)
+    with open(script_path, 'r') as file:
+        return file.read().splitlines()
+
+def fast_boot_enabled(argv): # --fast flag, PYOS_FAST_BOOT=1 or "fast_boot": true in system.conf
+    if "--fast" in argv or os.environ.get("PYOS_FAST_BOOT") == "1":
+        return True
+
+    config_path = os.path.join(FILE_SYSTEM, "etc", "system.conf")
+    if os.path.exists(config_path):
+        try:
+            with open(config_path, 'r') as file:
+                return bool(json.load(file).get("fast_boot", False))
+
+        except (json.JSONDecodeError, IOError):
+            return False
+
+    return False
+
+def run_batch(commands): # Run commands without the boot splash or the interactive shell
+    if not os.path.exists(FILE_SYSTEM):
+        print(f"File System does not exist. Running setup...")
+        setup()
+
+    import shell
+    return shell.run_batch(commands)
+
 if __name__ == "__main__":
     try:
         if os.environ.get("PYOS_RUNNING") == "1":
             sys.exit(0)
         
         os.environ["PYOS_RUNNING"] = "1"
-        
-        if os.name == 'nt':
+
+        boot_start = time.perf_counter()
+        args = [arg for arg in sys.argv[1:] if arg != "--fast"]
+
+        batch_commands = parse_batch_args(args)
+        if batch_commands is not None:
+            sys.exit(run_batch(batch_commands))
+
+        fast_boot = fast_boot_enabled(sys.argv[1:])
+        boot_timings = {}
+
+        if fast_boot:
+            os.environ["PYOS_FAST_BOOT"] = "1"
+
+        elif os.name == 'nt':
             os.system('cls')
         else:
             os.system('clear')
 
+        stage_start = time.perf_counter()
         load_kernel()
-        time.sleep(1)
+        boot_timings["load kernel"] = time.perf_counter() - stage_start
+
+        if not fast_boot:
+            time.sleep(1)
 
-        with open(kernel_path, 'r') as file:
-            kernel_code = compile(file.read(), kernel_path, 'exec')
+        stage_start = time.perf_counter()
+        kernel_code = code_cache.load_code(kernel_path)
+        boot_timings["compile kernel"] = time.perf_counter() - stage_start
         
-        kernel_globals = {"__file__": kernel_path, "__name__": "__main__"}
+        kernel_globals = {"__file__": kernel_path, "__name__": "__main__", "BOOT_START": boot_start, "BOOT_TIMINGS": boot_timings}
 
         exec(kernel_code, kernel_globals)
 
@@ -2,7 +2,7 @@ import os
 from PyInstaller.utils.hooks import collect_data_files
 from PyInstaller.building.datastruct import Tree
 
-hidden_imports = ['shell', 'filesystem', 'auth','package_manager',
+hidden_imports = ['shell', 'filesystem', 'auth','package_manager', 'file_index', 'tokenizer', 'code_cache', 'text_stream',
     'requests', 'ping3', 'cpuinfo', 'psutil'
 ]
 
@@ -0,0 +1,68 @@
+import os
+import struct
+import marshal
+import hashlib
+import importlib.util
+
+FILE_SYSTEM = "fs"
+CACHE_DIR = os.path.join(FILE_SYSTEM, "var", "cache", "pyc")
+HEADER = struct.Struct("<4sQQ") # Interpreter magic, source mtime (ns), source size
+
+
+def cache_path(path): # One cache entry per source file, named after its absolute path
+    digest = hashlib.sha1(os.path.abspath(path).encode("utf-8", "surrogateescape")).hexdigest()
+    return os.path.join(CACHE_DIR, digest + ".pyc")
+
+
+def read_cached(entry, header):
+    try:
+        with open(entry, 'rb') as file:
+            data = file.read()
+
+    except OSError:
+        return None
+
+    if data[:HEADER.size] != header:
+        return None
+
+    try:
+        return marshal.loads(data[HEADER.size:])
+
+    except (EOFError, ValueError, TypeError):
+        return None
+
+
+def write_cached(entry, header, code):
+    temp_file = f"{entry}.{os.getpid()}.tmp"
+
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(temp_file, 'wb') as file:
+            file.write(header)
+            file.write(marshal.dumps(code))
+
+        os.replace(temp_file, entry)
+
+    except OSError: # A read-only cache only costs us the speed-up
+        try:
+            os.remove(temp_file)
+
+        except OSError:
+            pass
+
+
+def load_code(path): # Code object for a source file, compiled only when the file or interpreter changed
+    info = os.stat(path)
+    header = HEADER.pack(importlib.util.MAGIC_NUMBER, info.st_mtime_ns, info.st_size)
+    entry = cache_path(path)
+
+    code = read_cached(entry, header)
+    if code is not None:
+        return code
+
+    with open(path, 'rb') as file:
+        code = compile(file.read(), path, 'exec')
+
+    write_cached(entry, header, code)
+    return code
+
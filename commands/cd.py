@@ -1,7 +1,7 @@
 # Command to change the current working directory.
 # Usage: cd <directory>
-# Version: 1.0.0
+# Version: 1.0.1
 
 def run(args, fs):
     if args:
-        fs.change_directory(args[0])
+        return fs.change_directory(args[0])
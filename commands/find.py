@@ -1,31 +1,227 @@
 # Command to find files and directories.
-# Usage: find <name_pattern>
-# Version: 1.0.0
+# Usage: find <name_pattern> / find [path] [-name <glob>, -iname <glob>, -regex <pattern>, -type f/d, -maxdepth <n>, -size [+-]<n>[c/k/M/G], -newer <file>]
+# Version: 1.2.3
 
 import os
+import re
+import fnmatch
+import collections
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import auth
+import file_index
+import text_stream
 
-def run(args, fs):
-    if not args:
-        print("Missing operand.")
-        return
-    
-    pattern = args[0].lower()
-    found = []
-
-    for root, dirs, files in os.walk(fs.current_dir):
-        for dir in dirs:
-            if pattern in dir.lower():
-                rel_path = fs.rel_path(os.path.join(root, dir))
-                found.append(rel_path + '/')
-        
-        for file in files:
-            if pattern in file.lower():
-                rel_path = fs.rel_path(os.path.join(root, file))
-                found.append(rel_path)
-    
-    if found:
-        for item in found:
-            print("- " + item)
+PARALLEL_THRESHOLD = 32 # Pending directories before the walk fans out to a thread pool
+MAX_WORKERS = 8
+SIZE_UNITS = {'c': 1, 'k': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+
+def scan(path, depth):
+    try:
+        with os.scandir(path) as entries:
+            return list(entries), depth
+
+    except OSError:
+        return [], depth
+
+def walk(start, maxdepth=None): # Yields (DirEntry, depth) as soon as each directory is scanned
+    pending = collections.deque([(start, 1)])
+    futures = set()
+    executor = None
+
+    try:
+        while pending or futures:
+            if executor is None and len(pending) >= PARALLEL_THRESHOLD:
+                executor = ThreadPoolExecutor(max_workers=MAX_WORKERS)
+
+            if executor:
+                while pending:
+                    path, depth = pending.popleft()
+                    futures.add(executor.submit(scan, path, depth))
+
+                done, futures = wait(futures, return_when=FIRST_COMPLETED)
+                results = [future.result() for future in done]
+
+            else:
+                path, depth = pending.popleft()
+                results = [scan(path, depth)]
+
+            for entries, depth in results:
+                subdirs = []
+
+                for entry in entries:
+                    yield entry, depth
+
+                    if entry.is_dir(follow_symlinks=False) and (maxdepth is None or depth < maxdepth):
+                        subdirs.append(entry.path)
+
+                # Directories the user may not read are listed but not entered, like ls
+                allowed = auth.check_permissions_many(subdirs, action="read")
+                pending.extend((path, depth + 1) for path, ok in zip(subdirs, allowed) if ok)
+
+    finally:
+        if executor:
+            for future in futures:
+                future.cancel()
+
+            executor.shutdown(wait=False)
+
+def parse_size(value): # "+10k" -> ('+', 10240)
+    sign = ''
+    if value[:1] in ('+', '-'):
+        sign = value[0]
+        value = value[1:]
+
+    unit = 1
+    if value[-1:] in SIZE_UNITS:
+        unit = SIZE_UNITS[value[-1]]
+        value = value[:-1]
+
+    return sign, int(value) * unit
+
+def parse_expression(args, fs): # Returns (start path, maxdepth, filters) or None
+    start = fs.current_dir
+    maxdepth = None
+    filters = []
+
+    if args and not args[0].startswith('-'):
+        start = fs.abs_path(args[0])
+        args = args[1:]
+
+    i = 0
+    while i < len(args):
+        option = args[i]
+
+        if i + 1 >= len(args):
+            print(f"Missing argument to '{option}'.")
+            return None
+
+        value = args[i + 1]
+        i += 2
+
+        try:
+            if option == "-name":
+                filters.append(lambda entry, path, glob=value: fnmatch.fnmatchcase(entry.name, glob))
+
+            elif option == "-iname":
+                filters.append(lambda entry, path, glob=value.lower(): fnmatch.fnmatchcase(entry.name.lower(), glob))
+
+            elif option == "-regex":
+                regex = re.compile(value)
+                filters.append(lambda entry, path, regex=regex: regex.fullmatch(path) is not None)
+
+            elif option == "-type":
+                if value == 'd':
+                    filters.append(lambda entry, path: entry.is_dir(follow_symlinks=False))
+                elif value == 'f':
+                    filters.append(lambda entry, path: entry.is_file(follow_symlinks=False))
+                else:
+                    print(f"Unknown type '{value}', use f or d.")
+                    return None
+
+            elif option == "-maxdepth":
+                maxdepth = int(value)
 
+            elif option == "-size":
+                sign, size = parse_size(value)
+                if sign == '+':
+                    filters.append(lambda entry, path, size=size: entry.stat(follow_symlinks=False).st_size > size)
+                elif sign == '-':
+                    filters.append(lambda entry, path, size=size: entry.stat(follow_symlinks=False).st_size < size)
+                else:
+                    filters.append(lambda entry, path, size=size: entry.stat(follow_symlinks=False).st_size == size)
+
+            elif option == "-newer":
+                reference = os.stat(fs.abs_path(value)).st_mtime_ns
+                filters.append(lambda entry, path, reference=reference: entry.stat(follow_symlinks=False).st_mtime_ns > reference)
+
+            else:
+                print(f"Unknown option '{option}'.")
+                return None
+
+        except (ValueError, re.error) as e:
+            print(f"Invalid argument to '{option}': {e}")
+            return None
+
+        except FileNotFoundError:
+            print(f"'{value}': No such file or directory")
+            return None
+
+    return start, maxdepth, filters
+
+def readable_dirs(virtual_paths):
+    allowed = auth.check_permissions_many([file_index.host_path(path) for path in virtual_paths], action="read")
+    return [path for path, ok in zip(virtual_paths, allowed) if ok]
+
+def search_index(index, pattern, fs): # Use the updatedb index instead of walking the tree
+    start = fs.rel_path()
+
+    for virtual_path, is_dir in file_index.iter_paths(index, start, readable_dirs):
+        if pattern in os.path.basename(virtual_path).lower():
+            if is_dir:
+                yield virtual_path + '/'
+            else:
+                yield virtual_path
+
+def search_tree(pattern, fs):
+    for entry, depth in walk(fs.current_dir):
+        if pattern in entry.name.lower():
+            if entry.is_dir(follow_symlinks=False):
+                yield fs.rel_path(entry.path) + '/'
+            else:
+                yield fs.rel_path(entry.path)
+
+def find_names(pattern, fs): # Plain "find <name_pattern>": case-insensitive substring match
+    pattern = pattern.lower()
+    found = False
+
+    index = file_index.load_index()
+    if file_index.is_fresh(index, fs.rel_path()):
+        matches = search_index(index, pattern, fs)
     else:
+        matches = search_tree(pattern, fs)
+
+    for item in matches:
+        found = True
+        yield "- " + item
+
+    if not found:
         print(f"No such file or directory.")
+
+    return found
+
+def run_stream(args, fs, stdin):
+    if not args:
+        print("Missing operand.")
+        return False
+
+    if len(args) == 1 and not args[0].startswith('-'):
+        return (yield from find_names(args[0], fs))
+
+    expression = parse_expression(args, fs)
+    if expression is None:
+        return False
+
+    start, maxdepth, filters = expression
+
+    if not os.path.isdir(start):
+        print(f"'{fs.rel_path(start)}': No such directory")
+        return False
+
+    if not auth.check_permissions(start, action="read"):
+        print("Permission denied.")
+        return False
+
+    for entry, depth in walk(start, maxdepth):
+        path = fs.rel_path(entry.path)
+
+        try:
+            matched = all(check(entry, path) for check in filters)
+
+        except OSError: # Removed while walking
+            continue
+
+        if matched:
+            yield path
+
+def run(args, fs):
+    return text_stream.write_lines(run_stream(args, fs, None))
@@ -1,18 +1,175 @@
 # Command to list files and directories in the current directory.
-# Usage: ls [-a]
-# Version: 1.0.0
+# Usage: ls [-a, -l, -h, -S, -t, -R, -1] [directory ...]
+# Version: 1.1.2
 
 import os
+import sys
+import stat
+import time
+import shutil
+import auth
+
+def parse_args(args):
+    flags = set()
+    paths = []
+
+    for arg in args:
+        if arg.startswith('-') and len(arg) > 1:
+            flags.update(arg[1:])
+        else:
+            paths.append(arg)
+
+    return flags, paths
+
+def human_size(size):
+    for unit in ("", "K", "M", "G", "T"):
+        if size < 1024 or unit == "T":
+            if unit == "":
+                return str(size)
+            return f"{size:.1f}{unit}"
+
+        size /= 1024
+
+def format_time(mtime, cache, now):
+    minute = int(mtime) // 60 # Entries from the same minute share one formatted string
+
+    if minute not in cache:
+        if now - mtime > 180 * 24 * 3600: # Older entries show the year instead of the time
+            cache[minute] = time.strftime("%b %d  %Y", time.localtime(mtime))
+        else:
+            cache[minute] = time.strftime("%b %d %H:%M", time.localtime(mtime))
+
+    return cache[minute]
+
+def scan(path, flags): # One scandir pass, stat results are cached on each DirEntry
+    entries = []
+
+    with os.scandir(path) as items:
+        for entry in items:
+            if 'a' not in flags and entry.name.startswith('.'):
+                continue
+            entries.append(entry)
+
+    if 'S' in flags:
+        entries.sort(key=lambda entry: (-entry.stat().st_size, entry.name))
+    elif 't' in flags:
+        entries.sort(key=lambda entry: (-entry.stat().st_mtime, entry.name))
+    else:
+        entries.sort(key=lambda entry: entry.name)
+
+    return entries
+
+def display_name(entry):
+    if entry.is_dir():
+        return entry.name + "/"
+
+    return entry.name
+
+def long_format(path, entries, flags):
+    owners = auth.get_directory_owners(path, [entry.name for entry in entries])
+    time_cache = {}
+    now = time.time()
+    rows = []
+    used = 0 # Disk usage in bytes, from st_blocks (512-byte units) where the platform has it
+
+    for entry, owner in zip(entries, owners):
+        info = entry.stat()
+        used += getattr(info, "st_blocks", 0) * 512
+
+        if 'h' in flags:
+            size = human_size(info.st_size)
+        else:
+            size = str(info.st_size)
+
+        rows.append((stat.filemode(info.st_mode), owner, size, format_time(info.st_mtime, time_cache, now), display_name(entry)))
+
+    if not rows:
+        return []
+
+    owner_width = max(len(row[1]) for row in rows)
+    size_width = max(len(row[2]) for row in rows)
+
+    lines = []
+    if hasattr(os.stat_result, "st_blocks"):
+        lines.append(f"total {human_size(used) if 'h' in flags else used // 1024}") # 1K blocks, like GNU ls
+    for mode, owner, size, mtime, name in rows:
+        lines.append(f"{mode} {owner:<{owner_width}} {size:>{size_width}} {mtime} {name}")
+
+    return lines
+
+def column_format(names): # Fill down columns to the terminal width, like ls
+    if not names:
+        return []
+
+    width = shutil.get_terminal_size().columns
+    column_width = max(len(name) for name in names) + 2
+    columns = max(1, width // column_width)
+    rows = (len(names) + columns - 1) // columns
+
+    lines = []
+    for row in range(rows):
+        cells = [names[index] for index in range(row, len(names), rows)]
+        lines.append("".join(name.ljust(column_width) for name in cells).rstrip())
+
+    return lines
+
+def list_directory(path, flags, one_per_line):
+    entries = scan(path, flags)
+
+    if 'l' in flags:
+        return entries, long_format(path, entries, flags)
+
+    names = [display_name(entry) for entry in entries]
+
+    if one_per_line:
+        return entries, names
+
+    return entries, column_format(names)
 
 def run(args, fs):
-    all_items = '-a' in args
-    for item in os.listdir(fs.current_dir):
-        if not all_items and item.startswith('.'):
+    flags, paths = parse_args(args)
+    one_per_line = '1' in flags or not sys.stdout.isatty() # Pipelines get one name per line
+
+    if paths:
+        targets = fs.abs_paths(paths)
+    else:
+        targets = [fs.current_dir]
+
+    output = []
+    show_headers = len(targets) > 1 or 'R' in flags
+    pending = list(reversed(targets))
+
+    while pending:
+        path = pending.pop()
+
+        if not os.path.isdir(path):
+            if os.path.exists(path):
+                output.append(fs.rel_path(path))
+            else:
+                output.append(f"Cannot access '{fs.rel_path(path)}': No such file or directory")
             continue
-        item_path = os.path.join(fs.current_dir, item)
 
-        if os.path.isdir(item_path):
-            print(f"{item}/")
+        if not auth.check_permissions(path, action="read"):
+            output.append(f"Cannot open directory '{fs.rel_path(path)}': Permission denied")
+            continue
 
-        else:
-            print(item)
+        try:
+            entries, lines = list_directory(path, flags, one_per_line)
+
+        except OSError as e:
+            output.append(f"Cannot open directory '{fs.rel_path(path)}': {e.strerror}")
+            continue
+
+        if show_headers:
+            if output:
+                output.append("")
+            output.append(f"{fs.rel_path(path)}:")
+
+        output.extend(lines)
+
+        if 'R' in flags:
+            subdirs = [entry.path for entry in entries if entry.is_dir(follow_symlinks=False)]
+            pending.extend(reversed(subdirs))
+
+    if output:
+        sys.stdout.write("\n".join(output) + "\n")
@@ -1,6 +1,6 @@
 # Command for creating directories.
 # Usage: mkdir <directory_name1> <directory_name2> ...
-# Version: 1.0.0
+# Version: 1.0.1
 
 import os
 
@@ -9,8 +9,7 @@ def run(args, fs):
         print("Missing operand.")
         return
     
-    for name in args:
-        new_dir = fs.abs_path(name)
+    for name, new_dir in zip(args, fs.abs_paths(args)):
         if not os.path.exists(new_dir):
             os.makedirs(new_dir)
 
@@ -1,10 +1,28 @@
 # Command pip for python package management.
-# Usage: pip install <package_name> [<package_name> ...] / pip uninstall <package_name> [<package_name> ...] / pip list
-# Version: 1.0.0
+# Usage: pip install [-U, --offline, --venv <path> ..., --find-links <dir>] <package_name> [<package_name> ...] / pip uninstall <package_name> [<package_name> ...] / pip list / pip cache
+# Version: 1.1.2
 
 import os
+import re
 import json
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
+import auth
+
+PIP_CACHE = os.path.abspath(os.path.join("fs", "var", "cache", "pip"))
+WHEELHOUSE = os.path.join(PIP_CACHE, "wheels") # Shared by every venv, used as a local package index
+MAX_WORKERS = 4
+
+INSTALL_ONLY_FLAGS = {"-U", "--upgrade", "--force-reinstall", "--user", "--no-warn-script-location"} # pip wheel rejects these
+VALUE_OPTIONS = {"-r", "--requirement", "-c", "--constraint", "-i", "--index-url", "--extra-index-url", "--upgrade-strategy"}
+PATH_OPTIONS = {"-r", "--requirement", "-c", "--constraint"}
+
+# Runs inside the venv: every installed distribution's metadata in one pass
+METADATA_SOURCE = (
+    "import json, importlib.metadata as m; "
+    "print(json.dumps({d.metadata['Name']: {'version': d.version, 'description': d.metadata.get('Summary') or ''} "
+    "for d in m.distributions() if d.metadata['Name']}))"
+)
 
 def get_current_venv():
     venv = os.path.join("fs", "var", "current_venv.json")
@@ -14,30 +32,64 @@ def get_current_venv():
             with open(venv, 'r') as file:
                 data = json.load(file)
                 return data.get("current_venv"), data.get("venv_name")
-            
+
         except:
             return None, None
-        
+
     return None, None
 
-def get_pip():
-    current_venv, venv_name = get_current_venv()
+def get_venv_python(venv):
+    for python in (os.path.join(venv, "Scripts", "python.exe"), os.path.join(venv, "bin", "python")):
+        if os.path.exists(python):
+            return python
 
-    if current_venv:
-        pip_path = os.path.join(current_venv, "Scripts", "pip.exe")
-        if os.path.exists(pip_path):
-            return pip_path
+    return None
 
-        pip_path = os.path.join(current_venv, "bin", "pip")
-        if os.path.exists(pip_path):
-            return pip_path
+def pip_env(venv):
+    env = os.environ.copy()
+    env['PIP_CACHE_DIR'] = os.path.join(PIP_CACHE, "http") # pip's own download cache, shared as well
+    env['PIP_DISABLE_PIP_VERSION_CHECK'] = "1"
 
-def update_packages_json(package_name, action="install"):
-    current_venv, venv_name = get_current_venv()
-    packages_json = os.path.join(current_venv, "lib", "packages.json")
+    if venv:
+        env['VIRTUAL_ENV'] = venv
+        scripts_path = os.path.join(venv, 'Scripts')
+        bin_path = os.path.join(venv, 'bin')
 
-    if not packages_json:
-        return
+        if os.path.exists(scripts_path):
+            env['PATH'] = scripts_path + os.pathsep + env.get('PATH', '')
+
+        elif os.path.exists(bin_path):
+            env['PATH'] = bin_path + os.pathsep + env.get('PATH', '')
+
+    return env
+
+def run_pip(venv, args, quiet=False):
+    command = [get_venv_python(venv), "-m", "pip"] + args
+
+    if quiet: # Concurrent installs: keep each venv's output together
+        return subprocess.run(command, env=pip_env(venv), capture_output=True, text=True)
+
+    return subprocess.run(command, env=pip_env(venv))
+
+def requirement_name(requirement): # "requests[socks]>=2.0" -> "requests"
+    return re.split(r"[\[<>=!~;@ ]", requirement, maxsplit=1)[0]
+
+def normalize(name):
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+def read_metadata(venv): # One subprocess for all packages instead of one pip show per package
+    try:
+        result = subprocess.run([get_venv_python(venv), "-c", METADATA_SOURCE], capture_output=True, text=True)
+        if result.returncode == 0:
+            return {normalize(name): info for name, info in json.loads(result.stdout).items()}
+
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"Warning: Could not read package metadata: {e}")
+
+    return {}
+
+def update_packages_json(venv, package_names, action="install"):
+    packages_json = os.path.join(venv, "lib", "packages.json")
 
     try:
         with open(packages_json, 'r') as file:
@@ -47,80 +99,174 @@ def update_packages_json(package_name, action="install"):
         packages = {}
 
     if action == "install":
-        pip = get_pip()
-        try:
-            result = subprocess.run([pip, "show", package_name], capture_output=True, text=True)
-            version = "unknown"
-            description = ""
+        metadata = read_metadata(venv)
 
-            if result.returncode == 0:
-                for line in result.stdout.splitlines():
-                    if line.startswith("Version:"):
-                        version = line.split(":", 1)[1].strip()
+        for requirement in package_names:
+            package_name = requirement_name(requirement)
+            packages[package_name] = metadata.get(normalize(package_name), {"version": "unknown", "description": ""})
 
-                    elif line.startswith("Summary:"):
-                        description = line.split(":", 1)[1].strip()
-
-            packages[package_name] = {
-                "version": version,
-                "description": description
-            }
-
-        except Exception as e:
-            print(f"Warning: Could not fetch version info for {package_name}: {e}")
-            packages[package_name] = {
-                "version": "unknown",
-                "description": ""
-            }
-
-    elif action == "uninstall" and package_name in packages:
-        del packages[package_name]
+    elif action == "uninstall":
+        for package_name in package_names:
+            packages.pop(package_name, None)
 
     try:
         with open(packages_json, 'w') as file:
             json.dump(packages, file, indent=2)
 
     except Exception as e:
-        print(f"Warning: Could not update packages tracking file: {e}") 
+        print(f"Warning: Could not update packages tracking file: {e}")
+
+def fill_wheelhouse(venv, requirements, find_links, offline): # Collect wheels once, every venv installs from them
+    os.makedirs(WHEELHOUSE, exist_ok=True)
+    args = ["wheel", "--quiet", "--wheel-dir", WHEELHOUSE, "--find-links", WHEELHOUSE]
 
-def install_package(package_names):
+    for directory in find_links:
+        args += ["--find-links", directory]
+
+    if offline: # Only what is already cached (or in --find-links)
+        args.append("--no-index")
+
+    # Online the index is always asked, so newer releases are picked up; cached wheels are reused when they match
+    return run_pip(venv, args + requirements).returncode == 0
+
+def install_offline(venv, requirements, install_options, quiet=False):
+    args = ["install", "--no-index", "--find-links", WHEELHOUSE] + install_options
+    return run_pip(venv, args + requirements, quiet=quiet)
+
+def interpreter_venvs(venvs): # One venv per distinct interpreter: wheels and markers depend on the Python version
+    interpreters = {}
+    for venv in venvs:
+        interpreters.setdefault(os.path.realpath(get_venv_python(venv)), venv)
+
+    return list(interpreters.values())
+
+def install_into(venvs, package_names, requirements, install_options, find_links, offline):
+    for venv in interpreter_venvs(venvs): # One after another, they all write to the shared wheelhouse
+        if not fill_wheelhouse(venv, requirements, find_links, offline):
+            if offline:
+                print(f"ERROR: The requested packages for {os.path.basename(venv)} are not in the local wheel cache.")
+            else:
+                print(f"ERROR: Could not download the requested packages for {os.path.basename(venv)}.")
+            return False
+
+    if len(venvs) == 1:
+        result = install_offline(venvs[0], requirements, install_options)
+        if result.returncode == 0:
+            update_packages_json(venvs[0], package_names, "install")
+
+        return result.returncode == 0
+
+    def install_one(venv): # No network here, so venvs can install side by side
+        result = install_offline(venv, requirements, install_options, quiet=True)
+        if result.returncode == 0:
+            update_packages_json(venv, package_names, "install")
+
+        return venv, result
+
+    ok = True
+    with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(venvs))) as executor:
+        for venv, result in executor.map(install_one, venvs):
+            if result.returncode == 0:
+                print(f"Installed into {os.path.basename(venv)}: {', '.join(package_names)}")
+
+            else:
+                ok = False
+                print(f"Failed to install into {os.path.basename(venv)}:")
+                print(result.stderr.strip() or result.stdout.strip())
+
+    return ok
+
+def parse_install_args(args, fs): # Returns (venvs, find_links, offline, package_names, requirements, install_options) or None
+    venvs = []
+    find_links = []
+    offline = False
+    package_names = []
+    requirements = [] # Package names and options shared by pip wheel and pip install
+    install_options = []
+    i = 0
+
+    while i < len(args):
+        if args[i] == "--offline":
+            offline = True
+
+        elif args[i] in INSTALL_ONLY_FLAGS:
+            install_options.append(args[i])
+
+        elif args[i] in VALUE_OPTIONS:
+            if i + 1 >= len(args):
+                print(f"Missing value for {args[i]}.")
+                return None
+
+            value = args[i + 1]
+            if args[i] in PATH_OPTIONS: # Requirement files are PyOS paths
+                value = fs.abs_path(value)
+
+            if args[i] == "--upgrade-strategy":
+                install_options += [args[i], value]
+            else:
+                requirements += [args[i], value]
+            i += 1
+
+        elif args[i] in ("--venv", "--find-links"):
+            if i + 1 >= len(args):
+                print(f"Missing value for {args[i]}.")
+                return None
+
+            path = fs.abs_path(args[i + 1])
+            if args[i] == "--venv":
+                venvs.append(path)
+            else:
+                find_links.append(path)
+            i += 1
+
+        elif args[i].startswith("-"): # Other pip options apply to both steps
+            requirements.append(args[i])
+
+        else:
+            package_names.append(args[i])
+            requirements.append(args[i])
+
+        i += 1
+
+    return venvs, find_links, offline, package_names, requirements, install_options
+
+def install_package(package_names, venvs=None, find_links=(), offline=False, requirements=None, install_options=()):
     current_venv, venv_name = get_current_venv()
 
-    if not current_venv:
+    if not venvs:
+        venvs = [current_venv] if current_venv else []
+
+    if not venvs:
         print("ERROR: pip install can only be used within a virtual environment.")
         print("Please create a virtual environment:")
         print("  python -m venv <name>")
         print("  source <name>/bin/activate")
         return False
 
+    for venv in venvs:
+        if not get_venv_python(venv):
+            print(f"ERROR: '{os.path.basename(venv)}' is not a virtual environment.")
+            return False
+
+        if not auth.check_permissions(venv, action="write"):
+            print(f"Permission denied: {os.path.basename(venv)}")
+            return False
+
+    for directory in find_links:
+        if not auth.check_permissions(directory, action="read"):
+            print("Permission denied.")
+            return False
+
     try:
-        pip = get_pip()
-        command = [pip, "install"] + package_names
-        env = os.environ.copy()
-
-        if current_venv:
-            env['VIRTUAL_ENV'] = current_venv
-            scripts_path = os.path.join(current_venv, 'Scripts')
-            bin_path = os.path.join(current_venv, 'bin')
-
-            if os.path.exists(scripts_path):
-                env['PATH'] = scripts_path + os.pathsep + env.get('PATH', '')
-
-            elif os.path.exists(bin_path):
-                env['PATH'] = bin_path + os.pathsep + env.get('PATH', '')
-        
-        result = subprocess.run(command, env=env)
-
-        if result.returncode == 0 and current_venv:
-            for package_name in package_names:
-                update_packages_json(package_name, "install")
-        
-        return result.returncode == 0
+        if requirements is None:
+            requirements = list(package_names)
+
+        return install_into(venvs, package_names, requirements, list(install_options), list(find_links), offline)
 
     except Exception as e:
         print(f"Error running pip install: {e}")
         return False
-    
+
 def uninstall_package(package_names):
     current_venv, venv_name = get_current_venv()
 
@@ -130,35 +276,19 @@ def uninstall_package(package_names):
         print("  python -m venv <name>")
         print("  source <name>/bin/activate")
         return False
-    
+
     try:
-        pip = get_pip()
-        command = [pip, "uninstall", "-y"] + package_names
-        env = os.environ.copy()
-
-        if current_venv:
-            env['VIRTUAL_ENV'] = current_venv
-            scripts_path = os.path.join(current_venv, 'Scripts')
-            bin_path = os.path.join(current_venv, 'bin')
-
-            if os.path.exists(scripts_path):
-                env['PATH'] = scripts_path + os.pathsep + env.get('PATH', '')
-                
-            elif os.path.exists(bin_path):
-                env['PATH'] = bin_path + os.pathsep + env.get('PATH', '')
-
-        result = subprocess.run(command, env=env)
-
-        if result.returncode == 0 and current_venv:
-            for package_name in package_names:
-                update_packages_json(package_name, "uninstall")
-        
+        result = run_pip(current_venv, ["uninstall", "-y"] + package_names)
+
+        if result.returncode == 0:
+            update_packages_json(current_venv, package_names, "uninstall")
+
         return result.returncode == 0
-    
+
     except Exception as e:
         print(f"Error running pip uninstall: {e}")
         return False
-    
+
 def list_packages():
     current_venv, venv_name = get_current_venv()
     if not current_venv:
@@ -167,13 +297,13 @@ def list_packages():
         print("  python -m venv <name>")
         print("  source <name>/bin/activate")
         return False
-    
+
     packages_json = os.path.join(current_venv, "lib", "packages.json")
 
     if not os.path.exists(packages_json):
         print("No packages installed in this virtual environment.")
         return False
-    
+
     try:
         with open(packages_json, 'r') as file:
             packages = json.load(file)
@@ -181,42 +311,61 @@ def list_packages():
         if not packages:
             print("No packages installed in this virtual environment.")
             return True
-        
+
         print(f"Installed packages in {venv_name} virtual environment:")
         for package, info in packages.items():
             print(f"{package} - Version: {info['version']}, Description: {info['description']}")
-        
+
         return True
-    
+
     except Exception as e:
         print(f"Error reading packages file: {e}")
         return False
-    
+
+def show_cache():
+    wheels = []
+    if os.path.isdir(WHEELHOUSE):
+        wheels = sorted(name for name in os.listdir(WHEELHOUSE) if name.endswith(".whl"))
+
+    size = sum(os.path.getsize(os.path.join(WHEELHOUSE, name)) for name in wheels)
+    print(f"Shared wheel cache: {len(wheels)} wheels, {size / 1024 / 1024:.1f} MB")
+
+    for name in wheels:
+        print(f" - {name}")
+
 def run(args, fs):
     if not args:
         print("Missing arguments.")
         return
-    
+
     command = args[0].lower()
 
     if command == "install":
-        if len(args) < 2:
-            print("Usage: pip install <package_name> [<package_name> ...]")
+        parsed = parse_install_args(args[1:], fs)
+        if parsed is None:
             return
-        
-        package_names = args[1:]
-        install_package(package_names)
+
+        venvs, find_links, offline, package_names, requirements, install_options = parsed
+
+        if not package_names and not any(option in requirements for option in ("-r", "--requirement")):
+            print("Usage: pip install [-U, --offline, --venv <path> ..., --find-links <dir>] <package_name> [<package_name> ...]")
+            return
+
+        return install_package(package_names, venvs, find_links, offline, requirements, install_options)
 
     elif command == "uninstall":
         if len(args) < 2:
             print("Usage: pip uninstall <package_name> [<package_name> ...]")
             return
-        
+
         package_names = args[1:]
-        uninstall_package(package_names)
+        return uninstall_package(package_names)
 
     elif command == "list":
         list_packages()
 
+    elif command == "cache":
+        show_cache()
+
     else:
         print(f"Unknown command: {command} (for this pip integration)")
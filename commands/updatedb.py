@@ -0,0 +1,13 @@
+# Command to update the file name index used by locate and find.
+# Usage: updatedb
+# Version: 1.0.0
+
+import time
+import file_index
+
+def run(args, fs):
+    start_time = time.perf_counter()
+    index, scanned, reused = file_index.update_index()
+    elapsed = time.perf_counter() - start_time
+
+    print(f"Indexed {len(index['dirs'])} directories ({scanned} scanned, {reused} unchanged) in {elapsed:.2f}s.")
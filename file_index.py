@@ -0,0 +1,156 @@
+import os
+import json
+import time
+
+FILE_SYSTEM = "fs"
+ROOT_DIR = os.path.abspath(FILE_SYSTEM)
+INDEX_FILE = os.path.join(ROOT_DIR, "var", "lib", "locate.db")
+
+
+def host_path(virtual_path):
+    if virtual_path == "/":
+        return ROOT_DIR
+
+    return os.path.join(ROOT_DIR, virtual_path.lstrip('/'))
+
+
+def join_virtual(parent, name):
+    if parent == "/":
+        return "/" + name
+
+    return parent + "/" + name
+
+
+def load_index():
+    if not os.path.exists(INDEX_FILE):
+        return None
+
+    try:
+        with open(INDEX_FILE, 'r') as file:
+            return json.load(file)
+
+    except (json.JSONDecodeError, IOError):
+        return None
+
+
+def save_index(index):
+    os.makedirs(os.path.dirname(INDEX_FILE), exist_ok=True)
+    temp_file = INDEX_FILE + ".tmp"
+
+    with open(temp_file, 'w') as file:
+        json.dump(index, file)
+
+    os.replace(temp_file, INDEX_FILE)
+
+
+def scan_directory(path): # One scandir per changed directory, entry types come from the DirEntry
+    dirs = []
+    files = []
+
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                dirs.append(entry.name)
+            else:
+                files.append(entry.name)
+
+    dirs.sort()
+    files.sort()
+    return dirs, files
+
+
+def update_index(): # Incremental: directories whose mtime did not change keep their stored listing
+    old_index = load_index() or {}
+    old_dirs = old_index.get("dirs", {})
+
+    new_dirs = {}
+    scanned = 0
+    reused = 0
+    stack = ["/"]
+
+    while stack:
+        virtual_path = stack.pop()
+        path = host_path(virtual_path)
+
+        try:
+            mtime = os.stat(path).st_mtime_ns
+
+        except OSError:
+            continue
+
+        old_entry = old_dirs.get(virtual_path)
+
+        if old_entry and old_entry.get("mtime") == mtime:
+            dirs = old_entry["dirs"]
+            files = old_entry["files"]
+            reused += 1
+
+        else:
+            try:
+                dirs, files = scan_directory(path)
+
+            except OSError:
+                continue
+
+            scanned += 1
+
+        new_dirs[virtual_path] = {"mtime": mtime, "dirs": dirs, "files": files}
+
+        for name in reversed(dirs):
+            stack.append(join_virtual(virtual_path, name))
+
+    index = {"updated": time.time(), "dirs": new_dirs}
+    save_index(index)
+
+    return index, scanned, reused
+
+
+def is_fresh(index, start="/"): # One stat per indexed directory below start: any changed listing changes its mtime
+    if not index:
+        return False
+
+    dirs = index.get("dirs", {})
+    if start not in dirs:
+        return False
+
+    stack = [start]
+
+    while stack:
+        virtual_path = stack.pop()
+        entry = dirs.get(virtual_path)
+
+        try:
+            if not entry or os.stat(host_path(virtual_path)).st_mtime_ns != entry.get("mtime"):
+                return False
+
+        except OSError:
+            return False
+
+        for name in entry["dirs"]:
+            stack.append(join_virtual(virtual_path, name))
+
+    return True
+
+
+def iter_paths(index, start="/", descend=None): # Yields (virtual_path, is_dir) for everything below start
+    dirs = index.get("dirs", {})
+    stack = [start]
+
+    while stack:
+        virtual_path = stack.pop()
+        entry = dirs.get(virtual_path)
+
+        if not entry:
+            continue
+
+        for name in entry["dirs"]:
+            yield join_virtual(virtual_path, name), True
+
+        for name in entry["files"]:
+            yield join_virtual(virtual_path, name), False
+
+        subdirs = [join_virtual(virtual_path, name) for name in entry["dirs"]]
+        if descend: # Keeps only the directories the caller may enter
+            subdirs = descend(subdirs)
+
+        stack.extend(reversed(subdirs))
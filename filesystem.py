@@ -1,14 +1,39 @@
 import os
+import re
 import json
+from collections import OrderedDict
 import auth
 
+PATH_CACHE_SIZE = 4096 # Most recently resolved (current_dir, path) pairs kept by abs_path
+
+# PS1-style escapes: \v venv, \u user, \h host, \w path, \W last path part, \$ prompt character, \e escape
+DEFAULT_PROMPT = "\\v\\e[38;2;30;211;154m\\u@\\h\\e[0m:\\e[36m\\w\\e[0m\\$ "
+PROMPT_FIELDS = {
+    "v": "{venv}",
+    "u": "{user}",
+    "h": "{host}",
+    "w": "{path}",
+    "W": "{dir}",
+    "$": "{char}",
+    "e": "\033",
+    "\\": "\\",
+}
+
 class FileSystem:
     def __init__(self):
         self.ROOT_DIR = os.path.abspath("fs")
         self.current_dir = self.ROOT_DIR
+        self.path_cache = OrderedDict()
+        self.path_cache_hits = 0
+        self.path_cache_misses = 0
         self.current_user = "sys"
         self.hostname = "pyos"
+        self.prompt_template = DEFAULT_PROMPT
+        self.venv_state = (None, None)
+        self.prompt_path_cache = (None, None)
+        self.prompt_cache = (None, None)
         self.load_system_config()
+        self.prompt_format = self.compile_prompt(self.prompt_template)
     
     def load_system_config(self): # Load system configuration
         config_path = os.path.join(self.ROOT_DIR, "etc", "system.conf")
@@ -16,10 +41,38 @@ class FileSystem:
             with open(config_path, 'r') as file:
                 config = json.load(file)
                 self.hostname = config.get("hostname", "pyos")
+                self.prompt_template = config.get("prompt", DEFAULT_PROMPT)
         else:
             print("System configuration file not found. Using default hostname 'pyos'.")
 
-    def abs_path(self, path): # Convert a given path to an absolute path
+    def abs_path(self, path): # Convert a given path to an absolute path (cached)
+        key = (self.current_dir, path)
+        cached = self.path_cache.get(key)
+
+        if cached is not None:
+            self.path_cache.move_to_end(key)
+            self.path_cache_hits += 1
+            return cached
+
+        self.path_cache_misses += 1
+        resolved = self.resolve_path(path)
+
+        self.path_cache[key] = resolved
+        if len(self.path_cache) > PATH_CACHE_SIZE: # Evict the least recently used entry
+            self.path_cache.popitem(last=False)
+
+        return resolved
+
+    def abs_paths(self, paths): # Resolve many paths at once, e.g. the results of a glob
+        return [self.abs_path(path) for path in paths]
+
+    def path_cache_info(self):
+        return {"hits": self.path_cache_hits, "misses": self.path_cache_misses, "size": len(self.path_cache), "max_size": PATH_CACHE_SIZE}
+
+    def clear_path_cache(self):
+        self.path_cache.clear()
+
+    def resolve_path(self, path):
         if path.startswith('~'): # Handle home directory
             if path == '~':
                 path = '/home'
@@ -55,7 +108,9 @@ class FileSystem:
             return False
             
         if os.path.isdir(move):
-            self.current_dir = move
+            if move != self.current_dir:
+                self.current_dir = move
+                self.clear_path_cache() # Relative entries belong to the old directory
             return True
         else:
             print("No such directory.")
@@ -74,53 +129,79 @@ class FileSystem:
 
         return rel
     
-    def prompt_path(self): # Get the path to display in the prompt
+    def prompt_path(self): # Get the path to display in the prompt (cached per directory)
+        if self.prompt_path_cache[0] == self.current_dir:
+            return self.prompt_path_cache[1]
+
         rel = self.rel_path()
+        display = rel
 
         if rel.startswith('/home/'):
-            if len(rel.split('/')) >= 3:
-                parts = rel.split('/')
-                if len(parts) == 3:
-                    return "~"
-                
-                else:
-                    return "~/" + '/'.join(parts[3:])
-        
-        return rel
-    
-    def get_venv_info(self):
+            parts = rel.split('/')
+            if len(parts) == 3:
+                display = "~"
+
+            else:
+                display = "~/" + '/'.join(parts[3:])
+
+        self.prompt_path_cache = (self.current_dir, display)
+        return display
+
+    def get_venv_info(self): # Active venv name, the file is only re-read when its mtime changes
         venv_file = os.path.join(self.ROOT_DIR, "var", "current_venv.json")
-        
-        if os.path.exists(venv_file):
-            try:
-                with open(venv_file, 'r') as file:
-                    data = json.load(file)
-                    return data.get("venv_name")
-                
-            except:
-                return None
-            
-        return None
-    
+
+        try:
+            signature = os.stat(venv_file).st_mtime_ns
+
+        except OSError:
+            self.venv_state = (None, None)
+            return None
+
+        if self.venv_state[0] == signature:
+            return self.venv_state[1]
+
+        try:
+            with open(venv_file, 'r') as file:
+                venv_name = json.load(file).get("venv_name")
+
+        except:
+            venv_name = None
+
+        self.venv_state = (signature, venv_name)
+        return venv_name
+
+    def refresh_venv_info(self): # Called by source / python deactivate after they change the venv
+        self.venv_state = (None, None)
+
+    def compile_prompt(self, template): # Turn a PS1-style template into a format string, once
+        def field(match):
+            return PROMPT_FIELDS.get(match.group(1), match.group(0))
+
+        template = template.replace('{', '{{').replace('}', '}}')
+        return re.sub(r'\\(.)', field, template)
+
     def prompt(self): # Shell prompt
-        
         self.current_user = auth.get_current_user()
-
         venv_name = self.get_venv_info()
-        venv_prefix = ""
+        is_root = auth.is_current_root()
 
+        key = (self.current_dir, self.current_user, venv_name, is_root)
+        if self.prompt_cache[0] == key:
+            return self.prompt_cache[1]
+
+        venv_prefix = ""
         if venv_name:
             venv_prefix = f"\033[38;2;255;165;0m({venv_name})\033[0m "
 
-        elif venv_name is None:
-            venv_prefix = ""
-
-        user_host = f"\033[38;2;30;211;154m{self.current_user}@{self.hostname}\033[0m"
-        path = f"\033[36m{self.prompt_path()}\033[0m"
-
-        if auth.is_current_root():
-            character = "#"
-        else:
-            character = "$"
-
-        return f"{venv_prefix}{user_host}:{path}{character} "
+        path = self.prompt_path()
+        rendered = self.prompt_format.format(
+            venv=venv_prefix,
+            user=self.current_user,
+            host=self.hostname,
+            path=path,
+            dir=os.path.basename(path.rstrip('/')) or path,
+            char="#" if is_root else "$",
+        )
+
+        self.prompt_cache = (key, rendered)
+        return rendered
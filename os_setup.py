@@ -11,7 +11,8 @@ SYSTEM_CONFIG = os.path.join(FILE_SYSTEM, "etc", "system.conf")
 PASSWD_FILE = os.path.join(FILE_SYSTEM, "etc", "passwd")
 SHADOW_FILE = os.path.join(FILE_SYSTEM, "etc", "shadow")
 PERMISSIONS_FILE = os.path.join(FILE_SYSTEM, "etc", "permissions.json")
-SESSIONS_FILE = os.path.join(FILE_SYSTEM, "var", "sessions.json")
+SESSIONS_JOURNAL = os.path.join(FILE_SYSTEM, "var", "sessions.jsonl")
+SESSIONS_INDEX = os.path.join(FILE_SYSTEM, "var", "sessions_index.json")
 PACKAGES_FILE = os.path.join(FILE_SYSTEM, "var", "packages.json")
 
 if getattr(sys, 'frozen', False):
@@ -61,6 +62,8 @@ def create_system_config(hostname, timezone):
         "locale": "en_US.UTF-8",
         "hostname": hostname,
         "first_boot": False,
+        "fast_boot": False,
+        "repositories": ["https://artur33.dev/pyos/packages"],
         "installation_date": time.strftime("%Y-%m-%d %H:%M:%S"),
     }
 
@@ -71,10 +74,12 @@ def create_system_config(hostname, timezone):
     print("Done.")
 
 def create_sessions_file():
-    print("\nCreating sessions file...")
-    sessions = {}
-    with open(SESSIONS_FILE, 'w') as f:
-        json.dump(sessions, f, indent=2)
+    print("\nCreating sessions journal...")
+    with open(SESSIONS_JOURNAL, 'w') as f:
+        pass
+
+    with open(SESSIONS_INDEX, 'w') as f:
+        json.dump({}, f)
     print("Done.")
 
 def hash_password(password: str) -> str:
@@ -1,17 +1,89 @@
 import os
-import sys
 import json
 import requests
 import hashlib
 import shutil
+import time
+import contextlib
+import pathlib
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import auth
+import shell
 
-PACKAGE_SERVER = "https://artur33.dev/pyos/packages"
+PACKAGE_SERVER = "https://artur33.dev/pyos/packages" # Default when system.conf lists no repositories
+SYSTEM_CONFIG = os.path.join("fs", "etc", "system.conf")
 PACKAGE_JSON_FILE = os.path.join("fs", "var", "packages.json")
+PACKAGE_JOURNAL_FILE = PACKAGE_JSON_FILE + ".journal" # New registry, fully written before it replaces the old one
+PACKAGE_LOCK_FILE = os.path.join("fs", "var", "packages.lock")
 BIN_DIR = os.path.join("fs", "bin")
 TEMP_DIR = os.path.join("fs", "tmp")
+CACHE_DIR = os.path.join("fs", "var", "cache", "snakepkg")
+INDEX_CACHE_FILE = os.path.join(CACHE_DIR, "packages.json")
+INDEX_META_FILE = os.path.join(CACHE_DIR, "index_meta.json")
+INDEX_TTL = 300 # Seconds a cached package list is trusted without asking the server
+MAX_DOWNLOAD_WORKERS = 4
+
+package_index = None # Package list pinned for the current transaction (e.g. a whole upgrade)
+index_repository = None # Repository the current package list came from
+http_session = None
+lock_file = None
+lock_depth = 0
+
+def lock_handle(file, lock):
+    if os.name == 'nt':
+        import msvcrt
+        file.seek(0)
+        msvcrt.locking(file.fileno(), msvcrt.LK_LOCK if lock else msvcrt.LK_UNLCK, 1)
+
+    else:
+        import fcntl
+        fcntl.flock(file.fileno(), fcntl.LOCK_EX if lock else fcntl.LOCK_UN)
+
+@contextlib.contextmanager
+def registry_lock(): # Serialize registry transactions across PyOS processes (reentrant within one)
+    global lock_file, lock_depth
+
+    if lock_depth == 0:
+        os.makedirs(os.path.dirname(PACKAGE_LOCK_FILE), exist_ok=True)
+        lock_file = open(PACKAGE_LOCK_FILE, 'a+')
+        lock_handle(lock_file, True)
+
+    lock_depth += 1
+
+    try:
+        yield
+
+    finally:
+        lock_depth -= 1
+
+        if lock_depth == 0:
+            lock_handle(lock_file, False)
+            lock_file.close()
+            lock_file = None
+
+def recover_package_json(): # Roll a complete journal forward, drop a torn one
+    if not os.path.exists(PACKAGE_JOURNAL_FILE):
+        return
+
+    with registry_lock():
+        if not os.path.exists(PACKAGE_JOURNAL_FILE):
+            return
+
+        try:
+            with open(PACKAGE_JOURNAL_FILE, 'r') as file:
+                json.load(file)
+
+            os.replace(PACKAGE_JOURNAL_FILE, PACKAGE_JSON_FILE)
+            print("Recovered packages.json from an interrupted transaction.")
+
+        except (json.JSONDecodeError, IOError):
+            os.remove(PACKAGE_JOURNAL_FILE)
 
 def load_package_json():
+    recover_package_json()
+
     if os.path.exists(PACKAGE_JSON_FILE):
         try:
             with open(PACKAGE_JSON_FILE, 'r') as file:
@@ -24,115 +96,351 @@ def load_package_json():
     return {}
 
 def clear_package_cache(package_name):
-    package = f"fs.bin.{package_name}"
-    if package in sys.modules:
-        del sys.modules[package]
+    if package_name in shell.command_registry:
+        shell.invalidate_module(package_name)
         print(f"Cleared {package_name} from cache.")
     else:
         print(f"{package_name} is not loaded in cache.")
 
-def save_package_json(data):
-    with open(PACKAGE_JSON_FILE, 'w') as file:
-        json.dump(data, file, indent=2)
+def save_package_json(data): # Write-ahead to the journal, fsync once, then commit with an atomic rename
+    try:
+        with registry_lock():
+            with open(PACKAGE_JOURNAL_FILE, 'w') as file:
+                json.dump(data, file, indent=2)
+                file.flush()
+                os.fsync(file.fileno())
+
+            os.replace(PACKAGE_JOURNAL_FILE, PACKAGE_JSON_FILE)
+
+    except OSError as e:
+        print(f"Error saving packages.json: {e}")
+        return False
 
     return True
 
-def fetch_package_list():
+def get_session(): # One pooled HTTP session shared by the index fetch and all downloads
+    global http_session
+
+    if http_session is None:
+        http_session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=MAX_DOWNLOAD_WORKERS, pool_maxsize=MAX_DOWNLOAD_WORKERS)
+        http_session.mount("http://", adapter)
+        http_session.mount("https://", adapter)
+
+    return http_session
+
+def write_json_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = path + ".tmp"
+
+    with open(temp_path, 'w') as file:
+        json.dump(data, file)
+
+    os.replace(temp_path, path)
+
+def get_repositories(): # "repositories" in system.conf: http(s):// servers or file:// directories, tried in order
+    try:
+        with open(SYSTEM_CONFIG, 'r') as file:
+            repositories = json.load(file).get("repositories")
+
+    except (json.JSONDecodeError, IOError):
+        repositories = None
+
+    if not repositories:
+        return [PACKAGE_SERVER]
+
+    return [repository.rstrip('/') for repository in repositories]
+
+def is_local_repository(repository):
+    return repository.startswith("file://")
+
+def local_repository_path(repository, name):
+    path = urllib.request.url2pathname(urllib.parse.urlparse(repository).path)
+    return os.path.join(path, name)
+
+def is_safe_file_name(name): # Index entries come from the repository, they must not point outside it
+    return isinstance(name, str) and name not in ("", ".", "..") and os.path.basename(name) == name and "/" not in name and "\\" not in name
+
+def load_cached_index():
+    try:
+        with open(INDEX_CACHE_FILE, 'r') as file:
+            index = json.load(file)
+
+        with open(INDEX_META_FILE, 'r') as file:
+            meta = json.load(file)
+
+    except (json.JSONDecodeError, IOError):
+        return None, {}
+
+    if meta.get("server") not in get_repositories():
+        return None, {}
+
+    return index, meta
+
+def save_cached_index(index, meta):
+    write_json_atomic(INDEX_CACHE_FILE, index)
+    write_json_atomic(INDEX_META_FILE, meta)
+
+def fetch_repository_index(repository, cached_index, meta): # Package list of one repository, None if unavailable
+    if is_local_repository(repository):
+        try:
+            with open(local_repository_path(repository, "packages.json"), 'r') as file:
+                index = json.load(file)
+
+        except (json.JSONDecodeError, IOError) as e:
+            print(f"Warning: Repository {repository} is unavailable: {e}")
+            return None
+
+        save_cached_index(index, {"server": repository, "fetched_at": time.time()})
+        return index
+
+    headers = {}
+    if cached_index is not None and meta.get("server") == repository: # Revalidate instead of downloading the whole list again
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+
     try:
-        response = requests.get(f"{PACKAGE_SERVER}/packages.json", timeout=30)
+        response = get_session().get(f"{repository}/packages.json", headers=headers, timeout=30)
+
+        if response.status_code == 304 and headers:
+            meta["fetched_at"] = time.time()
+            write_json_atomic(INDEX_META_FILE, meta)
+            return cached_index
+
         response.raise_for_status()
-        return response.json()
-    
+        index = response.json()
+
     except requests.RequestException as e:
-        print(f"Error fetching package list: {e}")
+        print(f"Warning: Repository {repository} is unavailable: {e}")
+        return None
+
+    except ValueError as e:
+        print(f"Warning: Could not read package list from {repository}: {e}")
         return None
+
+    save_cached_index(index, {
+        "server": repository,
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "fetched_at": time.time()
+    })
+
+    return index
+
+def fetch_package_list(refresh=False):
+    global index_repository
+
+    if package_index is not None and not refresh:
+        return package_index
+
+    cached_index, meta = load_cached_index()
+
+    if cached_index is not None and not refresh:
+        if time.time() - meta.get("fetched_at", 0) < INDEX_TTL:
+            index_repository = meta["server"]
+            return cached_index
+
+    for repository in get_repositories():
+        index = fetch_repository_index(repository, cached_index, meta)
+
+        if index is not None:
+            index_repository = repository
+            return index
+
+    if cached_index is not None:
+        print("Warning: Could not refresh package list, using cached copy.")
+        index_repository = meta["server"]
+        return cached_index
+
+    print("Error fetching package list: no repository is available.")
+    return None
+
+def begin_transaction(refresh=False): # Pin one package list for every step of a multi-package operation
+    global package_index
+
+    package_index = None
+    package_index = fetch_package_list(refresh)
+    return package_index
+
+def end_transaction():
+    global package_index
+
+    package_index = None
     
 def download_package(package_name, package_info):
+    repository = index_repository or get_repositories()[0]
+
+    if not is_safe_file_name(package_info.get('file')):
+        print(f"Refusing package '{package_name}': invalid file name in the package list.")
+        return None
+
     try:
-        url = f"{PACKAGE_SERVER}/{package_info['file']}"
-        response = requests.get(url, timeout=30)
-        response.raise_for_status()
+        if is_local_repository(repository):
+            with open(local_repository_path(repository, package_info['file']), 'rb') as file:
+                content = file.read()
+
+        else:
+            url = f"{repository}/{package_info['file']}"
+            response = get_session().get(url, timeout=30)
+            response.raise_for_status()
+            content = response.content
 
         if 'hash' in package_info:
-            calculated_hash = hashlib.sha256(response.content).hexdigest()
+            calculated_hash = hashlib.sha256(content).hexdigest()
             if calculated_hash != package_info['hash']:
                 print(f"Hash mismatch for package '{package_name}'.")
                 return None
         
-        return response.content
+        return content
     
-    except requests.RequestException as e:
+    except (requests.RequestException, IOError) as e:
         print(f"Error downloading package '{package_name}': {e}")
         return None
 
-def install_package(package_name):
-    if not auth.is_current_root():
-        print("Permission denied: You must be root to install packages.")
-        return False
+def download_packages(packages): # Download in parallel, each package is verified as soon as it arrives
+    contents = {}
+
+    if not packages:
+        return contents
+
+    workers = min(MAX_DOWNLOAD_WORKERS, len(packages))
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(download_package, name, info): name for name, info in packages.items()}
+
+        for future in as_completed(futures):
+            package_name = futures[future]
+            package_content = future.result()
+
+            if package_content:
+                contents[package_name] = package_content
+                print(f"Downloaded {package_name}.")
+
+    return contents
+
+def write_package(package_name, package_content): # Stage next to the command, it replaces the old file only after the registry commit
+    staged_path = os.path.join(BIN_DIR, f"{package_name}.py.new")
+
+    with open(staged_path, 'wb') as package_file:
+        package_file.write(package_content)
     
-    print(f"Fetching package information for '{package_name}'...")
+    os.chmod(staged_path, 0o755)  # Make the script executable?
+    return staged_path
 
+def discard_staged(staged_paths):
+    for staged_path in staged_paths:
+        if os.path.exists(staged_path):
+            os.remove(staged_path)
+
+def install_transaction(package_names, upgrade=False): # Download everything, then commit the registry once
     available_packages = fetch_package_list()
 
     if not available_packages:
         print("Failed to fetch package list from server.")
-        return False
-    
-    if package_name not in available_packages:
-        print(f"Package '{package_name}' not found.")
-        return False
-    
-    package_info = available_packages[package_name]
+        return []
+
     local_package_json = load_package_json()
+    selected = {}
 
-    if package_name in local_package_json:
-        print(f"Package '{package_name}' is already installed.")
-        return False
+    for package_name in package_names:
+        if package_name not in available_packages:
+            print(f"Package '{package_name}' not found.")
+            continue
 
-    print(f"Installing {package_name} v{package_info['version']}...")
+        if package_name in local_package_json and not upgrade:
+            print(f"Package '{package_name}' is already installed.")
+            continue
 
-    package_content = download_package(package_name, package_info)
-    
-    if not package_content:
-        return False
-    
-    package_path = os.path.join(BIN_DIR, f"{package_name}.py")
+        selected[package_name] = available_packages[package_name]
 
-    try:
-        with open(package_path, 'wb') as package_file:
-            package_file.write(package_content)
-        
-        os.chmod(package_path, 0o755)  # Make the script executable?
+    if not selected:
+        return []
+
+    for package_name, package_info in selected.items():
+        if upgrade:
+            print(f"Upgrading {package_name} to v{package_info['version']}...")
+        else:
+            print(f"Installing {package_name} v{package_info['version']}...")
+
+    contents = download_packages(selected)
+
+    with registry_lock(): # Re-read under the lock so concurrent PyOS processes don't lose each other's changes
+        return commit_packages(selected, contents)
+
+def commit_packages(selected, contents):
+    local_package_json = load_package_json()
+    installed = []
+    package_paths = []
+    staged_paths = []
+
+    for package_name in selected:
+        if package_name not in contents:
+            continue
+
+        package_info = selected[package_name]
+        package_path = os.path.join(BIN_DIR, f"{package_name}.py")
+
+        try:
+            staged_paths.append(write_package(package_name, contents[package_name]))
+
+        except Exception as e: # The installed command (if any) is untouched, only the staged copy goes
+            print(f"Error installing package '{package_name}': {e}")
+            discard_staged([package_path + ".new"])
+            continue
 
         local_package_json[package_name] = {
             "version": package_info['version'],
             "description": package_info.get('description', ''),
             "file": f"{package_name}.py",
-            "source": "PyOS Package Server"
+            "source": index_repository or PACKAGE_SERVER
         }
 
-        if not save_package_json(local_package_json):
-            if os.path.exists(package_path):
-                os.remove(package_path)
+        installed.append(package_name)
+        package_paths.append(package_path)
 
-            return False
-        
-        auth.update_permissions(package_path, "root")
+    if not installed:
+        return []
+
+    if not save_package_json(local_package_json):
+        discard_staged(staged_paths)
+        return []
+
+    for staged_path, package_path in zip(staged_paths, package_paths):
+        os.replace(staged_path, package_path)
 
+    auth.update_permissions_many([auth.rel_path(os.path.abspath(path)) for path in package_paths], "root")
+
+    for package_name in installed:
+        shell.invalidate_module(package_name)
         print(f"Package '{package_name}' installed successfully.")
-        return True
-    
-    except Exception as e:
-        print(f"Error installing package '{package_name}': {e}")
-        if os.path.exists(package_path):
-            os.remove(package_path)
+
+    return installed
+
+def install_packages(package_names):
+    if not auth.is_current_root():
+        print("Permission denied: You must be root to install packages.")
         return False
     
+    print(f"Fetching package information for {', '.join(package_names)}...")
+
+    installed = install_transaction(package_names)
+    return len(installed) == len(package_names)
+
+def install_package(package_name):
+    return install_packages([package_name])
+    
 def remove_package(package_name):
     if not auth.is_current_root():
         print("Permission denied: You must be root to remove packages.")
         return False
-    
+
+    with registry_lock():
+        return remove_transaction(package_name)
+
+def remove_transaction(package_name):
     local_package_json = load_package_json()
 
     if package_name not in local_package_json:
@@ -166,7 +474,16 @@ def upgrade_package(package_name = None):
     if not auth.is_current_root():
         print("Permission denied: You must be root to upgrade packages.")
         return False
-    
+
+    begin_transaction(refresh=True) # Upgrades revalidate against the server, then reuse that list
+
+    try:
+        return upgrade_packages(package_name)
+
+    finally:
+        end_transaction()
+
+def upgrade_packages(package_name = None):
     local_package_json = load_package_json()
 
     if package_name is None:
@@ -195,17 +512,12 @@ def upgrade_package(package_name = None):
         for name, current, latest in updates:
             print(f"{name}: v{current} -> v{latest}")
 
-        success = 0
-        
         response = input("Do you want to upgrade all packages? (Y/n): ").strip().lower()
         if response in ['y', 'yes', '']:
-            for name, current, latest in updates:
-                print(f"\nUpgrading {name}...")
-                if upgrade_single_package(name):
-                    success += 1
+            upgraded = install_transaction([name for name, current, latest in updates], upgrade=True)
             
-            print(f"\nSuccessfully upgraded {success}/{len(updates)} packages.")
-            return success == len(updates)
+            print(f"\nSuccessfully upgraded {len(upgraded)}/{len(updates)} packages.")
+            return len(upgraded) == len(updates)
 
         else:
             print("Upgrade cancelled.")
@@ -240,10 +552,44 @@ def upgrade_single_package(package_name):
 
     print(f"Upgrading {package_name} from v{current_version} to v{latest_version}...")
 
-    if remove_package(package_name):
-        return install_package(package_name)
+    return len(install_transaction([package_name], upgrade=True)) == 1
+
+def refresh_package_list():
+    print("Refreshing package list...")
+    available_packages = fetch_package_list(refresh=True)
+
+    if not available_packages:
+        print("Failed to fetch package list from server.")
+        return False
+
+    print(f"Package list is up to date ({len(available_packages)} packages available).")
+    return True
+
+def mirror_repository(destination): # Copy the package list and every package file into a local directory
+    available_packages = fetch_package_list(refresh=True)
+
+    if not available_packages:
+        print("Failed to fetch package list from server.")
+        return False
+
+    print(f"Mirroring {len(available_packages)} packages from {index_repository}...")
+
+    contents = download_packages(available_packages)
+    os.makedirs(destination, exist_ok=True)
+
+    for package_name, package_content in contents.items():
+        if not is_safe_file_name(available_packages[package_name]['file']):
+            continue
+
+        with open(os.path.join(destination, available_packages[package_name]['file']), 'wb') as file:
+            file.write(package_content)
+
+    mirrored = {name: info for name, info in available_packages.items() if name in contents}
+    write_json_atomic(os.path.join(destination, "packages.json"), mirrored)
 
-    return False
+    print(f"Mirrored {len(mirrored)}/{len(available_packages)} packages.")
+    print(f"Add \"{pathlib.Path(os.path.abspath(destination)).as_uri()}\" to \"repositories\" in /etc/system.conf to use it.")
+    return len(mirrored) == len(available_packages)
 
 def list_installed_packages():
     local_package_json = load_package_json()
@@ -4,7 +4,13 @@ import sys
 import json
 from filesystem import FileSystem
 import auth
+import tokenizer
+import code_cache
+import text_stream
 import importlib.util
+import time
+import io
+import contextlib
 
 fs = FileSystem()
 
@@ -34,22 +40,49 @@ def is_package_available(package_name):
 
     return package_name in installed_packages
 
+command_registry = {} # Loaded command modules: name -> (signature, module)
+
+def module_signature(path): # Cheap change detection for a command file
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+
+    return (stat.st_mtime_ns, stat.st_size)
+
+def invalidate_module(name=None): # Drop one (or every) command from the registry
+    if name is None:
+        names = list(command_registry.keys())
+    else:
+        names = [name]
+
+    for command_name in names:
+        command_registry.pop(command_name, None)
+        sys.modules.pop(f"pyos_cmd_{command_name}", None)
+
 def load_module(name):
     module_name = f"pyos_cmd_{name}"
     command_path = os.path.abspath(os.path.join("fs", "bin", f"{name}.py"))
 
-    if not os.path.exists(command_path):
+    signature = module_signature(command_path)
+    if signature is None:
+        invalidate_module(name)
         return None
-    
-    if module_name in sys.modules:
-        del sys.modules[module_name]
+
+    cached = command_registry.get(name)
+    if cached and cached[0] == signature: # Unchanged since last load, reuse it
+        return cached[1]
+
+    invalidate_module(name)
 
     spec = importlib.util.spec_from_file_location(module_name, command_path)
     if not spec or not spec.loader:
         return None
     
     module = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(module)
+    exec(code_cache.load_code(command_path), module.__dict__) # Bytecode comes from /var/cache/pyc when unchanged
+    sys.modules[module_name] = module
+    command_registry[name] = (signature, module)
     return module
 
 def shell():
@@ -71,27 +104,153 @@ def shell():
                 auth.logout()
                 break
 
-            try:
-                command = command.split()
-                command_name = command[0]
-                args = command[1:]
-                command_module = load_module(command_name)
+            run_command(command)
 
-                if not command_module:
-                    print(f"Unknown command: {command_name}")
-                    continue
+        except KeyboardInterrupt:
+            print("\nUse the 'exit' command to quit the shell.")
 
-                if not check_module_permissions(command_module):
-                    print(f"Permission denied: {command_name}")
-                    continue
+def exit_status(result): # Map a command's return value to a shell exit status
+    if result is False:
+        return 1
 
-                command_module.run(args, fs)
-                
-            except ModuleNotFoundError:
-                print(f"Unknown command: {command}")
+    if isinstance(result, int) and not isinstance(result, bool):
+        return result
 
-        except KeyboardInterrupt:
-            print("\nUse the 'exit' command to quit the shell.")
+    return 0
+
+def resolve_command(command_name): # Load a command and check it can be run, returns (module, status)
+    command_module = load_module(command_name)
+
+    if not command_module:
+        print(f"Unknown command: {command_name}")
+        return None, 127
+
+    if not check_module_permissions(command_module):
+        print(f"Permission denied: {command_name}")
+        return None, 126
+
+    return command_module, 0
+
+def capture_output(command_module, args): # Adapter for print-based commands: stream their stdout lazily
+    buffer = io.StringIO()
+    with contextlib.redirect_stdout(buffer):
+        command_module.run(args, fs)
+
+    buffer.seek(0)
+    for line in buffer:
+        if line.endswith('\n'):
+            line = line[:-1]
+
+        yield line
+
+def stage_stream(command_module, args, stdin): # Output lines of one pipeline stage
+    if hasattr(command_module, "run_stream"):
+        return command_module.run_stream(args, fs, stdin)
+
+    return capture_output(command_module, args)
+
+def run_pipeline(stages): # Run "a | b | c", passing lines between stages as lazy iterators
+    commands = []
+    for stage in stages:
+        if not stage:
+            print("Syntax error: empty command in pipeline.")
+            return 2
+
+        command_module, status = resolve_command(stage[0])
+        if not command_module:
+            return status
+
+        commands.append((command_module, stage[1:]))
+
+    stream = None
+    for command_module, args in commands[:-1]:
+        stream = stage_stream(command_module, args, stream)
+
+    command_module, args = commands[-1]
+    if hasattr(command_module, "run_stream"):
+        return exit_status(text_stream.write_lines(command_module.run_stream(args, fs, stream)))
+
+    for line in stream: # The last stage does not read stdin, but earlier stages still run
+        pass
+
+    return exit_status(command_module.run(args, fs))
+
+def run_command(command): # Run a single command line and return its exit status
+    try:
+        stages = tokenizer.parse(command, fs) # Quotes, escapes and globs are handled here
+
+    except ValueError as e:
+        print(f"Syntax error: {e}.")
+        return 2
+
+    if len(stages) > 1:
+        try:
+            return run_pipeline(stages)
+
+        except ModuleNotFoundError:
+            print(f"Unknown command: {command}")
+            return 127
+
+    command = stages[0]
+    if not command:
+        return 0
+
+    command_name = command[0]
+    args = command[1:]
+
+    try:
+        command_module, status = resolve_command(command_name)
+        if not command_module:
+            return status
+
+        result = command_module.run(args, fs)
+
+    except ModuleNotFoundError:
+        print(f"Unknown command: {command}")
+        return 127
+
+    return exit_status(result)
+
+def run_batch(commands): # Non-interactive mode: run a stream of command lines without prompts
+    if not auth.get_current_user() and not auth.load_session(quiet=True):
+        if not auth.login():
+            print("Batch mode requires a logged in user.", file=sys.stderr)
+            return 1
+
+    total = 0
+    failed = 0
+    start_time = time.perf_counter()
+
+    for line in commands:
+        command = line.strip()
+        if not command or command.startswith('#'):
+            continue
+
+        if command == "exit":
+            break
+
+        total += 1
+        try:
+            status = run_command(command)
+
+        except Exception as e:
+            print(f"Error: {e}")
+            status = 1
+
+        if status != 0:
+            failed += 1
+
+        sys.stdout.flush()
+        print(f"[{status}] {command}", file=sys.stderr)
+
+    elapsed = time.perf_counter() - start_time
+    rate = total / elapsed if elapsed > 0 else 0.0
+    print(f"{total} commands, {failed} failed in {elapsed:.3f}s ({rate:.1f} commands/s)", file=sys.stderr)
+
+    if failed:
+        return 1
+
+    return 0
 
 def check_module_permissions(module):
     if auth.is_current_root():
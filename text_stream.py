@@ -0,0 +1,22 @@
+import sys
+
+
+def read_lines(path): # Lazily yield the lines of a file
+    with open(path) as file:
+        for line in file:
+            if line.endswith('\n'):
+                line = line[:-1]
+
+            yield line
+
+
+def write_lines(lines): # Print a stream of lines in one writelines call, returns the stream's own return value
+    result = None
+
+    def collect():
+        nonlocal result
+        result = yield from lines # A run_stream generator reports failure with "return False" or an exit code
+
+    sys.stdout.writelines(line + '\n' for line in collect())
+    sys.stdout.flush()
+    return result
@@ -0,0 +1,205 @@
+import os
+import re
+import fnmatch
+import auth
+
+GLOB_CHARS = "*?["
+
+
+class Word:
+    def __init__(self):
+        self.text = []    # The word with quotes and escapes removed
+        self.pattern = [] # The same word as a glob pattern, quoted wildcards escaped
+        self.magic = False
+
+    def add(self, char, quoted):
+        self.text.append(char)
+
+        if char in GLOB_CHARS:
+            if quoted:
+                self.pattern.append(f"[{char}]")
+                return
+
+            self.magic = True
+
+        self.pattern.append(char)
+
+
+def tokenize(line): # Split a command line into pipeline stages of words, raises ValueError on bad quoting
+    stages = [[]]
+    word = None
+    quote = None
+    i = 0
+
+    while i < len(line):
+        char = line[i]
+
+        if quote == "'": # Everything is literal until the closing quote
+            if char == "'":
+                quote = None
+            else:
+                word.add(char, True)
+
+        elif quote == '"':
+            if char == '"':
+                quote = None
+
+            elif char == '\\' and i + 1 < len(line) and line[i + 1] in '"\\$`':
+                i += 1
+                word.add(line[i], True)
+
+            else:
+                word.add(char, True)
+
+        elif char in " \t\n":
+            if word is not None:
+                stages[-1].append(word)
+                word = None
+
+        elif char == '|':
+            if word is not None:
+                stages[-1].append(word)
+                word = None
+            stages.append([])
+
+        else:
+            if word is None:
+                word = Word()
+
+            if char in "'\"":
+                quote = char
+
+            elif char == '\\':
+                if i + 1 < len(line):
+                    i += 1
+                    word.add(line[i], True)
+
+            else:
+                word.add(char, False)
+
+        i += 1
+
+    if quote:
+        raise ValueError(f"unterminated {quote} quote")
+
+    if word is not None:
+        stages[-1].append(word)
+
+    return stages
+
+
+def unescape(pattern): # Undo the [c] escaping of quoted wildcards
+    return re.sub(r'\[([*?\[])\]', r'\1', pattern)
+
+
+def has_magic(component): # A component needs a directory listing only if it has unescaped wildcards
+    return any(char in GLOB_CHARS for char in re.sub(r'\[[*?\[]\]', '', component))
+
+
+class GlobCache: # Directory listings and compiled patterns shared by every word of one command line
+    def __init__(self, fs):
+        self.fs = fs
+        self.listings = {}
+        self.matchers = {}
+
+    def listing(self, path): # One scandir per directory, even when several words hit it
+        if path not in self.listings:
+            entries = []
+
+            if auth.check_permissions(path, action="read"):
+                try:
+                    with os.scandir(path) as scan:
+                        entries = [(entry.name, entry.is_dir()) for entry in scan]
+
+                except OSError:
+                    pass
+
+            entries.sort()
+            self.listings[path] = entries
+
+        return self.listings[path]
+
+    def matcher(self, component):
+        if component not in self.matchers:
+            self.matchers[component] = re.compile(fnmatch.translate(component)).match
+
+        return self.matchers[component]
+
+
+def expand_pattern(pattern, cache): # Match a glob against the virtual file system, one component at a time
+    fs = cache.fs
+    components = pattern.split('/')
+
+    first_magic = 0 # Leading literal components are resolved once through abs_path
+    while not has_magic(components[first_magic]):
+        first_magic += 1
+
+    prefix = '/'.join(components[:first_magic])
+    if first_magic and not prefix: # Pattern starts with "/"
+        prefix = '/'
+
+    base = fs.abs_path(unescape(prefix)) if prefix else fs.current_dir
+    display_prefix = unescape(prefix)
+    if display_prefix and not display_prefix.endswith('/'):
+        display_prefix += '/'
+
+    matches = [(base, display_prefix)]
+
+    for index, component in enumerate(components[first_magic:]):
+        last = first_magic + index == len(components) - 1
+
+        if component == "": # "a//b" or a trailing slash, which only keeps directories
+            if last:
+                matches = [(path, shown) for path, shown in matches if os.path.isdir(path)]
+            continue
+
+        if not has_magic(component):
+            literal = unescape(component)
+            matches = [(os.path.join(path, literal), shown + literal + ('' if last else '/')) for path, shown in matches]
+            continue
+
+        match = cache.matcher(component)
+        show_hidden = component.startswith('.')
+        next_matches = []
+
+        for path, shown in matches:
+            for name, is_dir in cache.listing(path):
+                if name.startswith('.') and not show_hidden:
+                    continue
+
+                if not last and not is_dir:
+                    continue
+
+                if match(name):
+                    next_matches.append((os.path.join(path, name), shown + name + ('' if last else '/')))
+
+        matches = next_matches
+
+        if not matches:
+            return []
+
+    return [shown for path, shown in matches if os.path.lexists(path) and os.path.abspath(path).startswith(fs.ROOT_DIR)]
+
+
+def expand_words(words, cache):
+    args = []
+
+    for word in words:
+        text = ''.join(word.text)
+
+        if not word.magic:
+            args.append(text)
+            continue
+
+        matches = expand_pattern(''.join(word.pattern), cache)
+        if matches:
+            args.extend(matches)
+        else: # No match: the word is passed on unchanged, like bash does
+            args.append(text)
+
+    return args
+
+
+def parse(line, fs): # Tokenize a command line and expand its globs, returns a list of argument lists
+    cache = GlobCache(fs)
+    return [expand_words(words, cache) for words in tokenize(line)]